@@ -0,0 +1,182 @@
+# benchmark for pairing, standings and storage with synthetic tournaments
+#
+# Usage: python3 benchmarks/benchmark.py [-t 8 64 512] [-r 9] [-o out.json]
+# Results are written as json, a previous result file can be passed with
+# --compare to see the relative change of each timing.
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+from datetime import datetime
+from time import perf_counter
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             os.pardir, 'src'))
+
+from data.model import Tournament, Team
+from data import data_connector
+from controller import swiss_system
+
+
+_default_teams = [8, 9, 64, 65, 256, 257]
+_default_rounds = [1, 5, 9]
+
+
+def create_tournament(number_of_teams, seed):
+    # returns the tournament and a random skill for each team, which is used
+    # for skill based results. Only every second team gets a performance
+    # value, the others get a random one while seeding.
+    random.seed(seed)
+    tournament = Tournament(name='benchmark-' + str(number_of_teams))
+    skills = {}
+    for i in range(number_of_teams):
+        team = Team(name='team' + str(i),
+                    performance_value=i if i % 2 == 0 else -1)
+        skills[team.name] = random.random()
+        tournament.add_team(team)
+    return tournament, skills
+
+
+def enter_results(tournament, skills, results):
+    for game in tournament.rounds[-1].games:
+        if game.is_finished():
+            continue
+        if results == 'skill':
+            skill_a = skills[game.team_a]
+            skill_b = skills[game.team_b]
+            a_wins = random.random() < (skill_a + 0.1) / (skill_a + skill_b
+                                                          + 0.2)
+        else:
+            a_wins = random.random() < 0.5
+        loser_points = random.randint(0, 12)
+        if a_wins:
+            game.add_result(13, loser_points)
+        else:
+            game.add_result(loser_points, 13)
+
+
+def run_benchmark(number_of_teams, number_of_rounds, results, seed):
+    timings = {'seeding': 0.0, 'pairing': 0.0, 'standings': 0.0,
+               'save': 0.0, 'load': 0.0}
+
+    tournament, skills = create_tournament(number_of_teams, seed)
+
+    start = perf_counter()
+    swiss_system.check_and_fix_initial_performance_values(tournament)
+    swiss_system.calculate_next_round(tournament)
+    timings['seeding'] = perf_counter() - start
+
+    played_rounds = 1
+    while played_rounds < number_of_rounds:
+        enter_results(tournament, skills, results)
+
+        start = perf_counter()
+        swiss_system.calculate_standings(tournament)
+        timings['standings'] += perf_counter() - start
+
+        start = perf_counter()
+        swiss_system.calculate_next_round(tournament)
+        timings['pairing'] += perf_counter() - start
+
+        if len(tournament.rounds) == played_rounds:
+            # no valid round left
+            break
+        played_rounds += 1
+
+    enter_results(tournament, skills, results)
+    start = perf_counter()
+    swiss_system.calculate_standings(tournament)
+    timings['standings'] += perf_counter() - start
+
+    start = perf_counter()
+    # replaces the file of an earlier run with the same number of teams
+    data_connector.save(tournament, merge=False)
+    timings['save'] = perf_counter() - start
+
+    start = perf_counter()
+    data_connector.load(tournament.id)
+    timings['load'] = perf_counter() - start
+
+    return {'teams': number_of_teams, 'rounds': played_rounds,
+            'requested_rounds': number_of_rounds, 'results': results,
+            'seed': seed, 'timings': timings}
+
+
+def _get_key(run):
+    return '{}-{}-{}'.format(run['teams'], run['requested_rounds'],
+                             run['results'])
+
+
+def compare(runs, previous_file):
+    with open(previous_file, 'r') as infile:
+        previous = {_get_key(r): r for r in json.load(infile)['runs']}
+
+    for run in runs:
+        old = previous.get(_get_key(run))
+        if old is None:
+            continue
+        changes = []
+        for name, value in sorted(run['timings'].items()):
+            old_value = old['timings'].get(name)
+            if old_value:
+                changes.append('{}: {:+.0%}'.format(
+                    name, value / old_value - 1))
+        print('{:20}{}'.format(_get_key(run), ', '.join(changes)))
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        description='Benchmark pairing, standings and storage of the '
+                    'tournament-manager with synthetic tournaments.')
+    parser.add_argument('-t', '--teams', metavar='Teams', nargs='+',
+                        type=int, default=_default_teams,
+                        help='Number of teams of the tournaments.')
+    parser.add_argument('-r', '--rounds', metavar='Rounds', nargs='+',
+                        type=int, default=_default_rounds,
+                        help='Number of rounds of the tournaments.')
+    parser.add_argument('--results', nargs='+', default=['random', 'skill'],
+                        choices=['random', 'skill'],
+                        help='How results are determined: randomly or based '
+                             'on a random skill of the teams.')
+    parser.add_argument('-s', '--seed', metavar='Seed', type=int, default=1,
+                        help='Seed for the random generator.')
+    parser.add_argument('-o', '--output', metavar='File',
+                        default='benchmark.json',
+                        help='File for the results.')
+    parser.add_argument('-c', '--compare', metavar='File',
+                        help='Results of a previous run to compare with.')
+    return parser
+
+
+def main():
+    args = create_parser().parse_args()
+
+    runs = []
+    with tempfile.TemporaryDirectory() as data_dir:
+        # save and load tournaments in a temporary directory
+        os.environ['SNAP_USER_COMMON'] = data_dir
+        for teams in args.teams:
+            for rounds in args.rounds:
+                for results in args.results:
+                    run = run_benchmark(teams, rounds, results, args.seed)
+                    runs.append(run)
+                    print('{:20}{}'.format(_get_key(run), ', '.join(
+                        '{}: {:.4f}s'.format(name, value)
+                        for name, value in sorted(run['timings'].items()))))
+
+    with open(args.output, 'w') as outfile:
+        json.dump({'created': datetime.now().isoformat(),
+                   'python': platform.python_version(),
+                   'platform': platform.platform(),
+                   'runs': runs}, outfile, indent=2)
+
+    if args.compare is not None:
+        print()
+        compare(runs, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# benchmark for parallel result entry: several processes enter the results
+# of one round at the same time, each like a separate enter-result command
+#
+# Usage: python3 benchmarks/contention.py [-w 10] [-t 200] [-s json]
+# Prints the throughput and checks that no result has been lost.
+import argparse
+import os
+import sys
+import tempfile
+from multiprocessing import Process
+from time import perf_counter
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             os.pardir, 'src'))
+
+from controller import processes
+from data import data_connector
+
+_tournament = 'contention'
+
+
+def create_tournament(number_of_teams):
+    processes.create_tournament(_tournament)
+    processes.close_tournament()
+    processes.load_tournament(_tournament)
+    for i in range(number_of_teams):
+        processes.add_team('team' + str(i), i)
+    processes.start_tournament()
+    game_ids = [g.id for g in processes._open_tournament.rounds[0].games
+                if not g.is_finished()]
+    processes.close_tournament()
+    return game_ids
+
+
+def enter_results(game_ids):
+    for id in game_ids:
+        processes.load_tournament(_tournament)
+        game = processes._open_tournament.get_game_by_id(id)
+        processes.add_result(game, 13, id % 13)
+        processes.close_tournament()
+
+
+def run_benchmark(number_of_teams, number_of_writers):
+    game_ids = create_tournament(number_of_teams)
+
+    writers = [Process(target=enter_results,
+                       args=(game_ids[i::number_of_writers],))
+               for i in range(number_of_writers)]
+    start = perf_counter()
+    for w in writers:
+        w.start()
+    for w in writers:
+        w.join()
+    duration = perf_counter() - start
+
+    tournament = data_connector.load(_tournament)
+    lost = [id for id in game_ids
+            if not tournament.get_game_by_id(id).is_finished()]
+    return len(game_ids), duration, lost
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        description='Benchmark parallel result entry of the '
+                    'tournament-manager.')
+    parser.add_argument('-w', '--writers', metavar='Writers', type=int,
+                        default=10, help='Number of parallel processes.')
+    parser.add_argument('-t', '--teams', metavar='Teams', type=int,
+                        default=200, help='Number of teams.')
+    parser.add_argument('-s', '--storage', default='json',
+                        choices=['json', 'journal', 'lazy', 'sqlite'],
+                        help='Storage mode.')
+    return parser
+
+
+def main():
+    args = create_parser().parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.environ['SNAP_USER_COMMON'] = data_dir
+        os.environ['TOURNAMENT_MANAGER_STORAGE'] = args.storage
+        results, duration, lost = run_benchmark(args.teams, args.writers)
+
+    print('{} results by {} writers in {:.2f}s: {:.0f} results/s, {} lost'
+          .format(results, args.writers, duration, results / duration,
+                  len(lost)))
+
+
+if __name__ == '__main__':
+    main()
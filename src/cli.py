@@ -1,13 +1,18 @@
 import argparse
+import csv
+import shlex
 import sys
 from pathlib import Path
-from operator import attrgetter
 from threading import Thread
-from time import sleep
+from time import sleep, monotonic
 
+from controller import export
 from controller import processes
+from controller import tables
 from controller.errors import NoTeamsError
+from controller.search import PairingSearch
 from data import data_connector
+from data.errors import ConflictError
 
 _progress_indicator_stopped = True
 
@@ -15,7 +20,7 @@ _progress_indicator_stopped = True
 def create_tournament(args):
     f = Path(data_connector._get_file_path(args.tournament[0]))
 
-    if f.is_file():
+    if data_connector.exists(args.tournament[0]):
         if not ask_yes_no('Tournament already exists. Do you want to '
                           'overwrite existing file?'):
             return
@@ -56,6 +61,66 @@ def add_team(args):
     processes.close_tournament()
 
 
+def import_teams(args):
+    try:
+        processes.load_tournament(args.tournament[0])
+    except FileNotFoundError:
+        print('Could not open the tournament. Have you created the tournament, yet?', 
+              'if not, try the "create-tournament" command.')
+        return
+
+    if processes.check_tournament_started():
+        print('Tournament already started. It is not possible to add more '
+              'teams.')
+        processes.close_tournament()
+        return
+
+    lines = _read_lines(args.file)
+    if lines is None:
+        processes.close_tournament()
+        return
+
+    added = 0
+    skipped = 0
+    errors = 0
+    reader = csv.reader(lines)
+    for row in reader:
+        # name and optional performance value, the first line can be a
+        # header
+        row = [f.strip() for f in row]
+        if len(row) == 0 or row[0] == '' or row[0].startswith('#'):
+            continue
+        if reader.line_num == 1 and row[0].lower() in ['name', 'team']:
+            continue
+
+        try:
+            performance_value = int(row[1]) if len(row) > 1 and \
+                row[1] != '' else -1
+        except ValueError:
+            print('Line', str(reader.line_num) + ':', 'Performance value must '
+                  'be a number.')
+            errors += 1
+            continue
+
+        # the teams are indexed by name, so this does not depend on the
+        # number of teams
+        if processes.check_team_already_exists(row[0]):
+            if not args.overwrite:
+                print('Line', str(reader.line_num) + ':', 'There is already a '
+                      'team with the name', row[0] + '. Use --overwrite to '
+                      'overwrite existing teams.')
+                skipped += 1
+                continue
+            processes.remove_team(name=row[0])
+
+        processes.add_team(row[0], performance_value)
+        added += 1
+
+    print(added, 'teams added,', skipped, 'skipped,', errors,
+          'lines with errors.')
+    processes.close_tournament()
+
+
 def remove_team(args):
     try:
         processes.load_tournament(args.tournament[0])
@@ -71,7 +136,7 @@ def remove_team(args):
         return
 
     try:
-        processes.remove_team(args.name[0])
+        processes.remove_team(name=args.name[0])
     except ValueError:
         print('The team you wanted to remove has not been added to the tournament.')
 
@@ -127,10 +192,14 @@ def start_tournament(args):
         return
 
     # check performance values of teams and assign random values
+    search = PairingSearch(args.time_budget[0], args.jobs[0])
+    progress_indicator = _start_progress_indicator(search)
     try:
-        processes.start_tournament()
+        processes.start_tournament(search)
     except NoTeamsError:
         print('There are no teams in this tournament. Use the "add-team" command.')
+    finally:
+        _stop_progress_indicator(progress_indicator, search)
 
     processes.close_tournament()
 
@@ -184,7 +253,12 @@ def next_round(args):
         return
 
     # calculate standings, calculate next round
-    processes.calculate_next_round()
+    search = PairingSearch(args.time_budget[0], args.jobs[0])
+    progress_indicator = _start_progress_indicator(search)
+    try:
+        processes.calculate_next_round(search)
+    finally:
+        _stop_progress_indicator(progress_indicator, search)
     processes.close_tournament()
 
 
@@ -228,31 +302,12 @@ def show_round(args):
     # check round number, and use latest round if none or invalid is given
     round_number = _check_round_number(args.round[0])
 
-    teams = processes._open_tournament.teams
-    max_team_name = 6 if max([len(t.name) for t in teams]) + 2 < 6 else max(
-        [len(t.name) for t in teams]) + 2
-    points_width = 8
-    game_width = len('Number') + 2
-
     print('Round', str(round_number + 1))
-    print('{game_number:{game_width}}{team_a:{team_width}}{team_b:{'
-          'team_width}}{points_a:{points_width}}{points_b:{'
-          'points_width}}'.format(game_number='Number', game_width=game_width,
-                                  team_a='Team A', team_b='Team B',
-                                  team_width=max_team_name, points_a='Points',
-                                  points_b='', points_width=points_width))
-    print('-' * (game_width + max_team_name * 2 + points_width * 2))
-
-    for g in processes._open_tournament.rounds[round_number].games:
-        print('{game_number:<{game_width}}{team_a:{team_width}}{team_b:{'
-              'team_width}}{points_a:{points_width}}{points_b:{'
-              'points_width}}'.format(
-                game_number=g.id, game_width=game_width, team_a=g.team_a,
-                team_b=g.team_b if g.team_b is not None else 'free',
-                team_width=max_team_name,
-                points_a='' if g.points_a == -1 else g.points_a,
-                points_b='' if g.points_b == -1 else g.points_b,
-                points_width=points_width))
+    rows = tables.get_page(
+        tables.get_round_rows(processes._open_tournament, round_number),
+        args.page[0], args.top[0])
+    tables.write_text(sys.stdout, ['Number', 'Team A', 'Team B', 'Points', ''],
+                      rows, [0, 0, 0, 8, 8])
 
     processes.close_tournament()
 
@@ -274,65 +329,24 @@ def show_standings(args):
 
     # update standings
     processes.calculate_standings()
-
-    teams = sorted(processes._open_tournament.teams,
-                   key=attrgetter('position'))
-    max_team_name = 6 if max([len(t.name) for t in teams]) + 2 < 6 else max(
-        [len(t.name) for t in teams]) + 2
-    position_width = len('Position') + 2
-    wins_width = len('Wins') + 2
-    losses_width = len('Losses') + 2
-    bh_width = len('BH') + 2
-    fbh_width = len('FBH') + 2
-    sb_width = len('SB') + 2
-    koya_width = len('Kayo') + 2
-    points_diff_width = len('Points difference') + 2
-    points_width = len('Points') + 2
-    points_against_width = len('Points against') + 2
-    fl_width = len('FR') + 2
-    pv_width = len('PV') + 2
-    print('{position:{position_width}}{team:{team_width}}{wins:{wins_width}}{'
-          'losses:{losses_width}}{bh:{bh_width}}{fbh:{fbh_width}}{sb:{'
-          'sb_width}}{koya:{koya_width}}{points_diff:{points_diff_width}}{'
-          'points:{points_width}}{points_against:{points_against_width}}{fl:{'
-          'fl_width}}{pv:{pv_width}}'.format(
-            position='Position', position_width=position_width,
-            team='Team', team_width=max_team_name,
-            wins='Wins', wins_width=wins_width,
-            losses='Losses', losses_width=losses_width,
-            bh='BH', bh_width=bh_width, fbh='FBH', fbh_width=fbh_width,
-            sb='SB', sb_width=sb_width, koya='Koya', koya_width=koya_width,
-            points_diff='Points difference',
-            points_diff_width=points_diff_width,
-            points='Points', points_width=points_width,
-            points_against='Points against',
-            points_against_width=points_against_width,
-            fl='FR', fl_width=fl_width, pv='PV', pv_width=pv_width))
-
-    print('-' * (
-        position_width + max_team_name + wins_width + losses_width +
-        bh_width + fbh_width + sb_width + koya_width + points_diff_width +
-        points_width + points_against_width + fl_width + pv_width))
-
-    for t in teams:
-        print('{position:<{position_width}}{team:{team_width}}{wins:{'
-              'wins_width}}{losses:{losses_width}}{bh:{bh_width}}{fbh:{'
-              'fbh_width}}{sb:{sb_width}}{koya:{koya_width}}{points_diff:{'
-              'points_diff_width}}{points:{points_width}}{points_against:{'
-              'points_against_width}}{fl:{fl_width}}{pv:{pv_width}}'.format(
-                position=t.position, position_width=position_width,
-                team=t.name, team_width=max_team_name,
-                wins=t.wins, wins_width=wins_width,
-                losses=t.losses, losses_width=losses_width,
-                bh=t.bh, bh_width=bh_width, fbh=t.fbh, fbh_width=fbh_width,
-                sb=t.sb, sb_width=sb_width, koya=t.koya, koya_width=koya_width,
-                points_diff=t.points - t.points_against,
-                points_diff_width=points_diff_width,
-                points=t.points, points_width=points_width,
-                points_against=t.points_against,
-                points_against_width=points_against_width,
-                fl=t.fl, fl_width=fl_width,
-                pv=t.performance_value, pv_width=pv_width))
+    if args.verify:
+        _verify_standings()
+
+    # the terminal has no space for the number of matches
+    columns = [c for c in tables.standings_columns if c != 'Matches']
+    rows = ([r[0], r[1]] + r[3:] for r in tables.get_page(
+                tables.get_standings_rows(processes._open_tournament),
+                args.page[0], args.top[0]))
+    tables.write_text(sys.stdout, columns, rows, [0] * len(columns))
+
+    if args.capacity:
+        lower, upper = processes.estimate_remaining_rounds()
+        if lower == upper:
+            capacity = str(lower)
+        else:
+            capacity = 'at least {}, at most {}'.format(lower, upper)
+        print()
+        print('Rounds possible without repeated games:', capacity)
 
     processes.close_tournament()
 
@@ -352,26 +366,9 @@ def enter_result(args):
         processes.close_tournament()
         return
 
-    # check the game number exists
-    if args.game[0] < 1 or args.game[0] > len(
-        processes._open_tournament.rounds) * len(
-        processes._open_tournament.rounds[0].games):
-        print('Game number does not exist. Use "show-round" command to see '
-              'games of current round.')
-        processes.close_tournament()
-        return
-
-    # check points >= 0
-    if args.a[0] < 0 or args.b[0] < 0:
-        print('Points scored by a team must be greater or equal to 0. At the '
-              'moment there is no way to enter negative scores.')
-        processes.close_tournament()
-        return
-
-    # check remis
-    if args.a[0] == args.b[0]:
-        print(
-            'At the moment remis are not supported. There has to be a winner!')
+    error = _check_result(args.game[0], args.a[0], args.b[0])
+    if error is not None:
+        print(error)
         processes.close_tournament()
         return
 
@@ -390,6 +387,61 @@ def enter_result(args):
     processes.close_tournament()
 
 
+def enter_results(args):
+    try:
+        processes.load_tournament(args.tournament[0])
+    except FileNotFoundError:
+        print('Could not open the tournament. Have you created the tournament, yet?', 
+              'if not, try the "create-tournament" command.')
+        return
+
+    # Check tournament is started
+    if not processes.check_tournament_started():
+        print(
+            'Tournament has not been started. Use "start-tournament" command.')
+        processes.close_tournament()
+        return
+
+    lines = _read_lines(args.file)
+    if lines is None:
+        processes.close_tournament()
+        return
+
+    entered = 0
+    errors = 0
+    for line_number, line in enumerate(lines, start=1):
+        # game, points team A, points team B separated by comma, semicolon
+        # or whitespace, the first line can be a header starting with the
+        # name of the game column
+        fields = line.replace(',', ' ').replace(';', ' ').split()
+        if len(fields) == 0 or fields[0].startswith('#'):
+            continue
+        if line_number == 1 and fields[0].lower() in _result_header:
+            continue
+
+        try:
+            game_number, points_a, points_b = [int(f) for f in fields]
+        except ValueError:
+            error = 'Expected game number, points of team A and points of ' \
+                    'team B.'
+        else:
+            error = _check_result(game_number, points_a, points_b)
+            game = processes._open_tournament.get_game_by_id(game_number)
+            if error is None and game.is_finished() and not args.overwrite:
+                error = 'Result for this game has already been entered. ' \
+                        'Use --overwrite to overwrite results.'
+        if error is not None:
+            print('Line', str(line_number) + ':', error)
+            errors += 1
+            continue
+
+        processes.add_result(game, points_a, points_b)
+        entered += 1
+
+    print(entered, 'results entered,', errors, 'lines with errors.')
+    processes.close_tournament()
+
+
 def export_round(args):
     try:
         processes.load_tournament(args.tournament[0])
@@ -406,7 +458,10 @@ def export_round(args):
     # check round number, and use latest round if none is given
     round_number = _check_round_number(args.round[0])
     # create latex file and build it with pdflatex
-    processes.export_round(round_number)
+    processes.export_round(round_number, args.format[0], args.background)
+    if args.background:
+        print('Exporting in the background. Use "export-status" to see when '
+              'it is done.')
 
     processes.close_tournament()
 
@@ -426,11 +481,207 @@ def export_standings(args):
 
     # update standings and export them
     processes.calculate_standings()
-    processes.export_standings()
+    if args.verify:
+        _verify_standings()
+    processes.export_standings(args.format[0], args.background)
+    if args.background:
+        print('Exporting in the background. Use "export-status" to see when '
+              'it is done.')
 
     processes.close_tournament()
 
 
+def export_all(args):
+    try:
+        processes.load_tournament(args.tournament[0])
+    except FileNotFoundError:
+        print('Could not open the tournament. Have you created the tournament, yet?', 
+              'if not, try the "create-tournament" command.')
+        return
+
+    if not processes.check_tournament_started():
+        print('Tournament has not started. Nothing to export.')
+        processes.close_tournament()
+        return
+
+    # update standings and export all rounds and the standings
+    processes.calculate_standings()
+    failures = processes.export_all(args.jobs[0], args.format[0])
+    for file, reason in failures:
+        print('Could not export', file + ':', reason)
+
+    processes.close_tournament()
+
+
+def export_status(args):
+    if not data_connector.exists(args.tournament[0]):
+        print('Could not open the tournament. Have you created the tournament, yet?', 
+              'if not, try the "create-tournament" command.')
+        return
+
+    states = processes.get_export_status(args.tournament[0])
+    if not states:
+        print('There are no background exports.')
+    for status in states:
+        if status['state'] == 'running':
+            print(status['file'], status['format'] + ':', 'running since',
+                  status['started'])
+        elif status['state'] == 'done':
+            print(status['file'], status['format'] + ':', 'done at',
+                  status['finished'])
+        else:
+            print(status['file'], status['format'] + ':', 'failed,',
+                  status['reason'])
+
+
+# first column of a header line of enter-results
+_result_header = ('game', 'number')
+
+
+def _read_lines(file):
+    # lines of the file or of stdin for "-", None if it can not be read
+    if file == '-':
+        return sys.stdin.readlines()
+    try:
+        with open(file, 'r', newline='') as infile:
+            return infile.readlines()
+    except OSError as e:
+        print('Could not read the file:', e)
+        return None
+
+
+def _check_result(game_number, points_a, points_b):
+    # returns why the result can not be entered or None if it is valid
+
+    # check the game number exists
+    if game_number < 1 or game_number > len(
+        processes._open_tournament.rounds) * len(
+        processes._open_tournament.rounds[0].games) or \
+            processes._open_tournament.get_game_by_id(game_number) is None:
+        return 'Game number does not exist. Use "show-round" command to ' \
+               'see games of current round.'
+
+    # check points >= 0
+    if points_a < 0 or points_b < 0:
+        return 'Points scored by a team must be greater or equal to 0. At ' \
+               'the moment there is no way to enter negative scores.'
+
+    # check remis
+    if points_a == points_b:
+        return 'At the moment remis are not supported. There has to be a ' \
+               'winner!'
+
+    return None
+
+
+def shell(args):
+    try:
+        processes.open_session(args.tournament[0])
+    except FileNotFoundError:
+        print('Could not open the tournament. Have you created the tournament, yet?', 
+              'if not, try the "create-tournament" command.')
+        return
+
+    print('Enter commands for the tournament without the tournament name, '
+          'e.g. "show-round". "checkpoint" saves the tournament, "exit" saves '
+          'it and quits the shell.')
+    parser = create_parser()
+    # 0: save after every command, which changed the tournament
+    interval = args.checkpoint[0]
+    last_checkpoint = monotonic()
+
+    try:
+        while True:
+            try:
+                line = input(args.tournament[0] + '> ')
+            except EOFError:
+                print()
+                break
+            try:
+                words = shlex.split(line)
+            except ValueError as e:
+                print(e)
+                continue
+            if len(words) == 0:
+                continue
+            if words[0] in ['exit', 'quit']:
+                break
+            if words[0] in ['create-tournament', 'ct', 'shell']:
+                print('This command can not be used in the shell.')
+                continue
+
+            if words[0] != 'checkpoint':
+                try:
+                    _run(parser.parse_args(args.tournament + words))
+                except SystemExit:
+                    # argparse has already printed the error or help
+                    continue
+                except Exception as e:
+                    # the shell keeps running, so the changes, which have
+                    # not been saved yet, are not lost
+                    print('The command failed:', e)
+                if monotonic() - last_checkpoint < interval:
+                    continue
+            _checkpoint()
+            last_checkpoint = monotonic()
+    finally:
+        # also when the shell is stopped unexpectedly
+        _checkpoint()
+        processes.close_session()
+
+
+def _checkpoint():
+    try:
+        processes.checkpoint()
+    except ConflictError as e:
+        print(e, 'The changes since the last checkpoint have been discarded.')
+        processes.reload_session()
+
+
+def _verify_standings():
+    differences = processes.verify_standings()
+    if len(differences) > 0:
+        print('Recalculated standings differ for: ' + ', '.join(differences))
+
+
+# progress indicator for the pairing search, only shown if there is a time
+# budget
+def _start_progress_indicator(search):
+    global _progress_indicator_stopped
+    search.start()
+    if not search.has_budget():
+        return None
+    _progress_indicator_stopped = False
+    thread = Thread(target=_show_progress, args=(search,), daemon=True)
+    thread.start()
+    return thread
+
+
+def _stop_progress_indicator(thread, search):
+    global _progress_indicator_stopped
+    search.stop()
+    if thread is None:
+        return
+    _progress_indicator_stopped = True
+    thread.join()
+    _print_progress(search)
+    print()
+
+
+def _show_progress(search):
+    while not _progress_indicator_stopped:
+        _print_progress(search)
+        sleep(0.1)
+
+
+def _print_progress(search):
+    print('\rSearching round... nodes explored: {nodes}, sum of win '
+          'differences in best round: {quality}'.format(nodes=search.nodes,
+                             quality='-' if search.best_quality is None
+                             else search.best_quality),
+          end='', flush=True)
+
+
 def ask_yes_no(msg):
     s = input(msg + " [y/N]: ")
     return s == 'y' or s == 'yes' or s == 'Y' or s == 'Yes' or s == 'YES'
@@ -483,6 +734,22 @@ def create_parser():
                                       'used to create standings for round 1.')
     parser_add_team.set_defaults(func=add_team)
 
+    # import_teams
+    parser_import_teams = subparsers.add_parser(
+        'import-teams', help='Adds many teams from a csv file with one team '
+                             'per line: name and optional performance '
+                             'value.')
+    parser_import_teams.add_argument('file', metavar='File', nargs='?',
+                                     default='-',
+                                     help='File with the teams. If not '
+                                          'specified or "-", the teams are '
+                                          'read from stdin.')
+    parser_import_teams.add_argument('--overwrite', action='store_true',
+                                     help='Overwrite teams with the same '
+                                          'name. Otherwise these teams are '
+                                          'skipped.')
+    parser_import_teams.set_defaults(func=import_teams)
+
     # show_teams
     parser_show_teams = subparsers.add_parser('show-teams',
                                               help='Shows all teams.')
@@ -503,6 +770,16 @@ def create_parser():
                                                          'Afterwards no '
                                                          'teams can be added '
                                                          'anymore.')
+    parser_start_tournament.add_argument('--time-budget', metavar='Seconds',
+                                         nargs=1, type=float, default=[None],
+                                         help='Maximum time to search for '
+                                              'the first round. Shows the '
+                                              'progress of the search.')
+    parser_start_tournament.add_argument('-j', '--jobs', metavar='Jobs',
+                                         nargs=1, type=_number_of_jobs,
+                                         default=[1],
+                                         help='Number of processes used to '
+                                              'search for the round.')
     parser_start_tournament.set_defaults(func=start_tournament)
 
     # stop_tournament
@@ -520,6 +797,16 @@ def create_parser():
                                                    'possible when all '
                                                    'matches of current round '
                                                    'are finished.')
+    parser_next_round.add_argument('--time-budget', metavar='Seconds',
+                                   nargs=1, type=float, default=[None],
+                                   help='Maximum time to search for the best '
+                                        'round. When it expires, the best '
+                                        'round found so far is used. Shows '
+                                        'the progress of the search.')
+    parser_next_round.add_argument('-j', '--jobs', metavar='Jobs', nargs=1,
+                                   type=_number_of_jobs, default=[1],
+                                   help='Number of processes used to search '
+                                        'for the round.')
     parser_next_round.set_defaults(func=next_round)
 
     # revert_round
@@ -537,6 +824,15 @@ def create_parser():
                                    default=[-1], type=int,
                                    help='Round to show. If not specified, '
                                         'current round is choosen.')
+    pages_show_round = parser_show_round.add_mutually_exclusive_group()
+    pages_show_round.add_argument('--page', metavar='Page', nargs=1,
+                                  default=[None], type=_page_or_rows,
+                                  help='Show only this page of ' +
+                                       str(tables.rows_per_page) +
+                                       ' rows.')
+    pages_show_round.add_argument('--top', metavar='N', nargs=1,
+                                  default=[None], type=_page_or_rows,
+                                  help='Show only the first N rows.')
     parser_show_round.set_defaults(func=show_round)
 
     # show_standings
@@ -544,6 +840,24 @@ def create_parser():
                                                   aliases=['ss'],
                                                   help='Shows current '
                                                        'standings.')
+    parser_show_standings.add_argument('--verify', action='store_true',
+                                       help='Recalculate all standings from '
+                                            'scratch and report teams, '
+                                            'whose stored standings '
+                                            'differ.')
+    parser_show_standings.add_argument('--capacity', action='store_true',
+                                       help='Estimate how many more rounds '
+                                            'can be played without '
+                                            'repeating a game.')
+    pages_show_standings = parser_show_standings.add_mutually_exclusive_group()
+    pages_show_standings.add_argument('--page', metavar='Page', nargs=1,
+                                      default=[None], type=_page_or_rows,
+                                      help='Show only this page of ' +
+                                           str(tables.rows_per_page) +
+                                           ' rows.')
+    pages_show_standings.add_argument('--top', metavar='N', nargs=1,
+                                      default=[None], type=_page_or_rows,
+                                      help='Show only the first N rows.')
     parser_show_standings.set_defaults(func=show_standings)
 
     # enter_result
@@ -561,24 +875,107 @@ def create_parser():
                                      type=int, help='Points of team B.')
     parser_enter_result.set_defaults(func=enter_result)
 
+    # enter_results
+    parser_enter_results = subparsers.add_parser(
+        'enter-results', help='Enters many results from a file with one '
+                              'result per line: game number, points of team '
+                              'A and points of team B, separated by comma '
+                              'or whitespace.')
+    parser_enter_results.add_argument('file', metavar='File', nargs='?',
+                                      default='-',
+                                      help='File with the results. If not '
+                                           'specified or "-", the results '
+                                           'are read from stdin.')
+    parser_enter_results.add_argument('--overwrite', action='store_true',
+                                      help='Overwrite results which have '
+                                           'already been entered. '
+                                           'Otherwise these lines are '
+                                           'reported as errors.')
+    parser_enter_results.set_defaults(func=enter_results)
+
     # export_round
     parser_export_round = subparsers.add_parser('export-round',
                                                 aliases=['exr'],
-                                                help='Export round as pdf.')
+                                                help='Export round as pdf, '
+                                                     'html, csv or markdown.')
     parser_export_round.add_argument('-r', '--round', metavar='Round', nargs=1,
                                      default=[-1], type=int,
                                      help='Round to export. If not '
                                           'specified, current round is '
                                           'chosen.')
+    parser_export_round.add_argument('-f', '--format', metavar='Format',
+                                     nargs=1, default=['pdf'],
+                                     choices=export.formats,
+                                     help='Format of the export: ' +
+                                          ', '.join(export.formats) + '. '
+                                          'Default is pdf.')
+    parser_export_round.add_argument('--background', action='store_true',
+                                     help='Export in a separate process and '
+                                          'return immediately. See '
+                                          '"export-status".')
     parser_export_round.set_defaults(func=export_round)
 
     # export_standings
     parser_export_standings = subparsers.add_parser('export-standings',
                                                     aliases=['exs'],
                                                     help='Export standings '
-                                                         'as pdf.')
+                                                         'as pdf, html, csv '
+                                                         'or markdown.')
+    parser_export_standings.add_argument('--verify', action='store_true',
+                                         help='Recalculate all standings '
+                                              'from scratch and report '
+                                              'teams, whose stored '
+                                              'standings differ.')
+    parser_export_standings.add_argument('-f', '--format', metavar='Format',
+                                         nargs=1, default=['pdf'],
+                                         choices=export.formats,
+                                         help='Format of the export: ' +
+                                              ', '.join(export.formats) + '. '
+                                              'Default is pdf.')
+    parser_export_standings.add_argument('--background', action='store_true',
+                                         help='Export in a separate process and '
+                                              'return immediately. See '
+                                              '"export-status".')
     parser_export_standings.set_defaults(func=export_standings)
 
+    # export_all
+    parser_export_all = subparsers.add_parser('export-all',
+                                              help='Export all rounds and '
+                                                   'the standings as pdf, '
+                                                   'html, csv or markdown.')
+    parser_export_all.add_argument('-j', '--jobs', metavar='Jobs', nargs=1,
+                                   default=[None], type=_number_of_jobs,
+                                   help='Number of pdflatex processes '
+                                        'running at the same time. Default '
+                                        'is the number of processors.')
+    parser_export_all.add_argument('-f', '--format', metavar='Format',
+                                   nargs=1, default=['pdf'],
+                                   choices=export.formats,
+                                   help='Format of the export: ' +
+                                        ', '.join(export.formats) + '. '
+                                        'Default is pdf.')
+    parser_export_all.set_defaults(func=export_all)
+
+    # export_status
+    parser_export_status = subparsers.add_parser('export-status',
+                                                 help='Shows the state of '
+                                                      'the exports in the '
+                                                      'background.')
+    parser_export_status.set_defaults(func=export_status)
+
+    # shell
+    parser_shell = subparsers.add_parser('shell',
+                                         help='Keeps the tournament in '
+                                              'memory and reads commands '
+                                              'for it until "exit".')
+    parser_shell.add_argument('-c', '--checkpoint', metavar='Seconds',
+                              nargs=1, default=[0], type=float,
+                              help='Save changes at most every given '
+                                   'seconds instead of after every '
+                                   'command. "checkpoint" saves '
+                                   'immediately.')
+    parser_shell.set_defaults(func=shell)
+
     return parser
 
 # cli checks
@@ -589,14 +986,35 @@ def _check_round_number(round):
         return len(processes._open_tournament.rounds) - 1
     return round_number
 
+
+def _page_or_rows(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            'pages and numbers of rows start at 1')
+    return number
+
+
+def _number_of_jobs(value):
+    jobs = int(value)
+    if jobs < 1:
+        raise argparse.ArgumentTypeError('at least one job is needed')
+    return jobs
+
 # main function for setup.py
 def main():
     parser = create_parser()
 
     args = parser.parse_args() 
 
+    _run(args)
+
+
+def _run(args):
     try:
         args.func(args)
+    except ConflictError as e:
+        print(e, 'Your changes have not been saved, please try again.')
     except AttributeError:
         print('Check the help (-h) to see what '
               'you can do here.')
@@ -2,4 +2,7 @@ class NoMatchError(Exception):
     pass
 
 class NoTeamsError(Exception):
-    pass
\ No newline at end of file
+    pass
+
+class SearchBudgetExpiredError(Exception):
+    pass
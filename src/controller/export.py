@@ -1,14 +1,35 @@
+import hashlib
 import os
+import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from string import Template
-from operator import attrgetter
 from pathlib import Path
 
+from controller import renderers
+from controller import tables
+from data.helper import write_atomic
 from data.model import Tournament, Round, Team, Game
 
 _export_path = 'export'
 _base = 'tournament-manager'
 _tex_ending = '.tex'
+_pdf_ending = '.pdf'
+
+# pdfs by the hash of their tex content, so an unchanged document does not
+# have to be compiled again
+_cache_path = '.cache'
+_max_cache_entries = 100
+# each parallel job has its own output directory for pdflatex
+_jobs_path = '.jobs'
+
+# buffer of the written tex files
+_buffer_size = 64 * 1024
+
+# templates by path, they are only read once
+_templates = {}
+
+formats = ['pdf'] + sorted(renderers.renderers)
 
 def _get_export_path(filename, ending=_tex_ending):
     path = os.environ.get('SNAP_USER_COMMON',
@@ -22,102 +43,233 @@ def _get_export_path(filename, ending=_tex_ending):
 def _load_template():
     path = os.environ.get('SNAP', default='')
     template = os.path.join(path, 'resources', 'latex', 'template.tex')
-    with open(template, 'r') as infile:
-        return Template(infile.read())
+    if template not in _templates:
+        with open(template, 'r') as infile:
+            _templates[template] = Template(infile.read())
+    return _templates[template]
 
 
-def _write_export(output_file, content):
+def _write_export(output_file, render):
+    # render(outfile) writes the tex content, which is not built in memory.
+    # Returns the hash of the content.
     path = _get_export_path(output_file)
     os.makedirs(os.path.dirname(path), exist_ok=True)
 
-    with open(path, 'w') as outfile:
-        outfile.write(content)
+    with open(path, 'w', buffering=_buffer_size) as outfile:
+        hashing_file = _HashingFile(outfile)
+        render(hashing_file)
+    return hashing_file.hexdigest()
+
 
+class _HashingFile:
+    # writes to outfile and hashes everything written
+    def __init__(self, outfile):
+        self._outfile = outfile
+        self._hash = hashlib.sha256()
 
-def _generate_export(file):
+    def write(self, s):
+        self._hash.update(s.encode())
+        return self._outfile.write(s)
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+
+def _generate_export(file, output_directory=None):
+    # compiles the tex file in output_directory, so parallel jobs do not
+    # share their aux and log files, and moves the pdf to the export folder
     path = _get_export_path(file)
+    if output_directory is None:
+        returncode = _run_pdflatex(path, os.path.dirname(path))
+        # remove aux and log
+        aux = _get_export_path(file, '.aux')
+        log = _get_export_path(file, '.log')
+        os.remove(aux)
+        os.remove(log)
+        return returncode
+
+    os.makedirs(output_directory, exist_ok=True)
+    try:
+        # the output of parallel jobs is not shown
+        returncode = _run_pdflatex(path, output_directory, subprocess.DEVNULL)
+        pdf = os.path.join(output_directory,
+                           os.path.basename(file) + _pdf_ending)
+        if os.path.isfile(pdf):
+            os.replace(pdf, _get_export_path(file, _pdf_ending))
+    finally:
+        shutil.rmtree(output_directory)
+    return returncode
+
 
+def _run_pdflatex(path, output_directory, output=None):
     if 'SNAP' in os.environ:
         pdflatex = os.path.join(os.environ.get('SNAP'), 'texlive', 'bin', 
                                     'x86_64-linux', 'pdflatex') 
-        subprocess.run([pdflatex, '-output-directory', os.path.dirname(path), 
-                    '-interaction=nonstopmode', path])
-    else:        
-        subprocess.run(['pdflatex', '-output-directory', os.path.dirname(path), 
-                    '-interaction=nonstopmode', path])
-    # remove aux and log
-    aux = _get_export_path(file, '.aux')
-    log = _get_export_path(file, '.log')
-    os.remove(aux)
-    os.remove(log)
-
-
-def export_round(tournament, round):
-    title_str = 'Round ' + str(round + 1)
-    subtitle_str = tournament.name
+    else:
+        pdflatex = 'pdflatex'
+    result = subprocess.run([pdflatex, '-output-directory', output_directory,
+                             '-interaction=nonstopmode', path], stdout=output)
+    return result.returncode
+
+
+def _export(file, key, output_directory=None):
+    # compiles the written tex file with the hash key. Returns the return
+    # code of pdflatex, 0 if the cached pdf is used.
+    cached = _get_export_path(os.path.join(_cache_path, key), _pdf_ending)
+    pdf = _get_export_path(file, _pdf_ending)
+    try:
+        shutil.copyfile(cached, pdf)
+        # mark as recently used
+        os.utime(cached)
+        return 0
+    except FileNotFoundError:
+        # not cached or removed by a parallel job
+        pass
+
+    returncode = _generate_export(file, output_directory)
+    if returncode == 0 and os.path.isfile(pdf):
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        shutil.copyfile(pdf, cached)
+        _remove_old_cache_entries(os.path.dirname(cached))
+    return returncode
+
+
+def _remove_old_cache_entries(path):
+    entries = []
+    for f in os.listdir(path):
+        try:
+            entries.append((os.path.getmtime(os.path.join(path, f)), f))
+        except FileNotFoundError:
+            # removed by a parallel job
+            pass
+    entries.sort(reverse=True)
+    for _, f in entries[_max_cache_entries:]:
+        try:
+            os.remove(os.path.join(path, f))
+        except FileNotFoundError:
+            # removed by a parallel job
+            pass
+
+
+def _export_text(file, format, title, subtitle, columns, rows):
+    # exports the table in a format, which does not need LaTeX
+    renderer, ending = renderers.renderers[format]
+    path = _get_export_path(file, ending)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_atomic(path, lambda outfile: renderer(outfile, title, subtitle,
+                                                columns, rows))
+
+
+def _get_round_file(tournament, round):
+    return os.path.relpath(tournament.name + '-r' + str(round + 1))
+
+
+def _get_standings_file(tournament):
+    return os.path.relpath(tournament.name + '-standings')
+
+
+def export_round(tournament, round, format='pdf'):
+    file = _get_round_file(tournament, round)
+    if format == 'pdf':
+        return _export(file, _write_export(
+            file, lambda outfile: render_round(outfile, tournament, round)))
+    _export_text(file, format, 'Round ' + str(round + 1), tournament.name,
+                 tables.round_columns, tables.get_round_rows(tournament, round))
+    return 0
+
+
+def export_standings(tournament, format='pdf'):
+    file = _get_standings_file(tournament)
+    if format == 'pdf':
+        return _export(file, _write_export(
+            file, lambda outfile: render_standings(outfile, tournament)))
+    _export_text(file, format, 'Standings', tournament.name,
+                 tables.standings_columns,
+                 tables.get_standings_rows(tournament))
+    return 0
+
+
+def export_all(tournament, jobs=None, format='pdf'):
+    # exports all rounds and the standings with at most jobs pdflatex
+    # processes at the same time. Returns the files, which could not be
+    # exported, with the reason.
+    if format != 'pdf':
+        # no LaTeX, writing the files is fast enough without jobs
+        for r in range(len(tournament.rounds)):
+            export_round(tournament, r, format)
+        export_standings(tournament, format)
+        return []
+
+    # the tex files are written before the jobs are started, so the
+    # tournament is only read by this thread
+    documents = []
+    for r in range(len(tournament.rounds)):
+        file = _get_round_file(tournament, r)
+        documents.append((file, _write_export(
+            file, lambda outfile: render_round(outfile, tournament, r))))
+    file = _get_standings_file(tournament)
+    documents.append((file, _write_export(
+        file, lambda outfile: render_standings(outfile, tournament))))
+
+    # by default as many jobs as processors, pdflatex is bound by the cpu
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [(file, executor.submit(
+                        _export, file, key,
+                        _get_export_path(os.path.join(_jobs_path, file), '')))
+                   for file, key in documents]
+
+    failures = []
+    for file, future in futures:
+        if future.exception() is not None:
+            failures.append((file, str(future.exception())))
+        elif future.result() != 0:
+            failures.append((file, 'pdflatex failed with exit code ' +
+                             str(future.result())))
+    return failures
+
+
+def _write_document(outfile, title, subtitle, columns, header, lines):
+    # writes the template with the lines as table content
+    marker = '\0'
+    before, after = _load_template().substitute(
+                        title=title,
+                        subtitle=subtitle,
+                        tablecolumns=columns,
+                        tableheader=header,
+                        tablecontent=marker).split(marker)
+    outfile.write(before)
+    for i, line in enumerate(lines):
+        if i != 0:
+            outfile.write('\\midrule\n')
+        outfile.write(line)
+    outfile.write(after)
+
+
+def render_round(outfile, tournament, round):
+    # writes the tex content of the round
     columns = 'lXXc'
     header = 'Number & Team A & Team B & Result \\\\'
-    content = ''
-    for i, game in enumerate(tournament.rounds[round].games):
-        team_a = game.team_a
-        team_b = 'free' if game.team_b is None else game.team_b
-        result = '$$ : $$' 
-        if game.is_finished():
-            result = ('$$' + str(game.points_a) + ' : ' + str(game.points_b)
-                      + '$$')
-        content += (str(game.id) + ' & ' + team_a + ' & ' + team_b + ' & '
-                    + result + ' \\\\' + '\n' )
-        if i != len(tournament.rounds[round].games) - 1:
-            content += '\\midrule'
-            content += '\n'
-    export_template = _load_template()
-    substituted_template = export_template.substitute(
-                               title=title_str,
-                               subtitle=subtitle_str,
-                               tablecolumns=columns, 
-                               tableheader=header,
-                               tablecontent=content)
-    file_name = os.path.relpath(tournament.name + '-r' + str(round + 1))
-    _write_export(file_name, substituted_template)
-    _generate_export(file_name)
-
-
-def export_standings(tournament):
-    title_str = 'Standings'
-    subtitle_str = tournament.name
-    
+    lines = (str(id) + ' & ' + team_a + ' & ' + team_b + ' & $$' +
+             str(points_a) + ' : ' + str(points_b) + '$$ \\\\\n'
+             for id, team_a, team_b, points_a, points_b in
+             tables.get_round_rows(tournament, round))
+    _write_document(outfile, 'Round ' + str(round + 1), tournament.name,
+                    columns, header, lines)
+
+
+def render_standings(outfile, tournament):
+    # writes the tex content of the standings
     columns = 'lXcccccccccc'
     header = ('P & Team & MP & W & L & BH & '
               'FBH & SB & Koya & P & PD & FR \\\\')
-    content = ''
-    for i, team in enumerate(sorted(tournament.teams, 
-                                    key=attrgetter('position'))):
-        position = str(team.position)
-        name = team.name
-        matches = str(team.wins + team.losses)
-        wins = str(team.wins)
-        losses = str(team.losses)
-        bh = str(team.bh)
-        fbh = str(team.fbh)
-        sb = str(team.sb)
-        koya = str(team.koya)
-        p = '$$ ' + str(team.points) + ':' + str(team.points_against) + ' $$'
-        pd = str(team.points - team.points_against)
-        fr = str(team.fl)
-        content += (position + ' & ' + name + ' & ' + matches + ' & ' + wins
-                    + ' & ' + losses + ' & ' + bh + ' & ' + fbh + ' & ' + sb
-                    + ' & ' + koya + ' & ' + p + ' & ' + pd
-                    + ' & ' + fr + ' \\\\' + '\n' )
-        if i != len(tournament.teams) - 1:
-            content += '\\midrule'
-            content += '\n'
-    export_template = _load_template()
-    substituted_template = export_template.substitute(
-                               title=title_str,
-                               subtitle=subtitle_str,
-                               tablecolumns=columns, 
-                               tableheader=header,
-                               tablecontent=content)
-    file_name = os.path.relpath(tournament.name + '-standings')
-    _write_export(file_name, substituted_template)
-    _generate_export(file_name)
+    lines = (' & '.join(str(v) for v in (
+                 position, name, matches, wins, losses, bh, fbh, sb, koya,
+                 '$$ ' + str(points) + ':' + str(points_against) + ' $$', pd,
+                 fr)) + ' \\\\\n'
+             for (position, name, matches, wins, losses, bh, fbh, sb, koya,
+                  pd, points, points_against, fr, pv) in
+             tables.get_standings_rows(tournament))
+    _write_document(outfile, 'Standings', tournament.name, columns, header,
+                    lines)
@@ -0,0 +1,193 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+from controller import export
+from data import json_serializer
+from data.helper import write_atomic, lock
+
+
+# Exports in a detached worker process, so the cli does not wait for
+# pdflatex. The tournament is written to a snapshot file, which the worker
+# loads and exports like export_round and export_standings. The state of
+# each export is kept in a status file in the export folder: running, done
+# or failed with the reason.
+
+_status_path = '.status'
+_status_ending = '.json'
+_snapshot_ending = '.snapshot'
+_lock_ending = '.lock'
+
+
+def _get_file(tournament, round):
+    # round None are the standings
+    if round is None:
+        return export._get_standings_file(tournament)
+    return export._get_round_file(tournament, round)
+
+
+def _get_status_path(file):
+    return export._get_export_path(os.path.join(_status_path, file),
+                                   _status_ending)
+
+
+def _write_status(file, status):
+    path = _get_status_path(file)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_atomic(path, lambda outfile: json.dump(status, outfile))
+
+
+def _read_status(file):
+    with open(_get_status_path(file), 'r') as infile:
+        return json.load(infile)
+
+
+def _lock_status(file):
+    # the cli and the worker both change the status, each change is made
+    # under this lock
+    path = _get_status_path(file)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return lock(path[:-len(_status_ending)] + _lock_ending)
+
+
+def _update_status(file, snapshot, update):
+    # update(status) changes the status of the export of snapshot, unless
+    # the file has been exported again in the meantime
+    with _lock_status(file):
+        status = _read_status(file)
+        if status['snapshot'] == snapshot:
+            update(status)
+            _write_status(file, status)
+
+
+def _finish(status, reason):
+    # reason None means the export is done
+    status['state'] = 'done' if reason is None else 'failed'
+    status['reason'] = reason
+    status['finished'] = datetime.now().isoformat(timespec='seconds')
+
+
+def start_export(tournament, round=None, format='pdf'):
+    # starts the worker for the round (or the standings, if round is None)
+    # and returns without waiting for it
+    file = _get_file(tournament, round)
+    jobs = os.path.dirname(export._get_export_path(
+        os.path.join(export._jobs_path, file)))
+    os.makedirs(jobs, exist_ok=True)
+    # each export has its own snapshot, so a second export of the same file
+    # does not replace the snapshot of the first one
+    fd, snapshot = tempfile.mkstemp(suffix=_snapshot_ending, dir=jobs)
+    with os.fdopen(fd, 'w', encoding='utf-8') as outfile:
+        outfile.write(json_serializer.dumps(tournament))
+
+    status = {'tournament': tournament.id, 'file': file, 'format': format,
+              'snapshot': snapshot, 'state': 'running', 'reason': None,
+              'pid': None,
+              'started': datetime.now().isoformat(timespec='seconds'),
+              'finished': None}
+    with _lock_status(file):
+        _write_status(file, status)
+
+    # the worker imports the packages from the same folder as the cli
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [os.path.dirname(os.path.dirname(os.path.abspath(__file__)))] +
+        [p for p in [env.get('PYTHONPATH')] if p])
+    try:
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'controller.export_worker', snapshot,
+             str(-1 if round is None else round), format],
+            env=env, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL, start_new_session=True)
+    except OSError as e:
+        os.remove(snapshot)
+        _update_status(file, snapshot,
+                       lambda status: _finish(status, str(e)))
+        raise
+
+    def set_pid(status):
+        # a fast worker may have finished already
+        if status['state'] == 'running':
+            status['pid'] = process.pid
+
+    _update_status(file, snapshot, set_pid)
+    return file
+
+
+def get_status(name):
+    # states of the background exports of the tournament with name, sorted
+    # by file. A running export, whose worker does not exist anymore, has
+    # failed.
+    path = os.path.dirname(_get_status_path('x'))
+    if not os.path.isdir(path):
+        return []
+    states = []
+    for f in sorted(os.listdir(path)):
+        if not f.endswith(_status_ending):
+            continue
+        try:
+            with open(os.path.join(path, f), 'r') as infile:
+                status = json.load(infile)
+        except (OSError, ValueError):
+            continue
+        if status['tournament'] != name:
+            continue
+        if status['state'] == 'running' and status['pid'] is not None and \
+                not _is_running(status['pid']):
+            status['state'] = 'failed'
+            status['reason'] = 'The export stopped unexpectedly.'
+        states.append(status)
+    return states
+
+
+def _is_running(pid):
+    # a stopped worker started by this process (e.g. in the shell) exists
+    # until it is reaped
+    if hasattr(os, 'WNOHANG'):
+        try:
+            if os.waitpid(pid, os.WNOHANG)[0] == pid:
+                return False
+        except ChildProcessError:
+            pass
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # exists, but belongs to someone else
+        return True
+    return True
+
+
+def run(snapshot, round, format):
+    # exports the tournament in snapshot, called in the worker process
+    with open(snapshot, 'r', encoding='utf-8') as infile:
+        tournament = json_serializer.loads(infile.read())
+    os.remove(snapshot)
+    file = _get_file(tournament, round)
+    reason = None
+
+    try:
+        # exports of the same file are compiled one after another, they
+        # share the tex, aux and log files
+        with lock(export._get_export_path(
+                os.path.join(export._jobs_path, file), _lock_ending)):
+            if round is None:
+                returncode = export.export_standings(tournament, format)
+            else:
+                returncode = export.export_round(tournament, round, format)
+    except Exception as e:
+        returncode = None
+        reason = str(e) or type(e).__name__
+
+    if returncode is not None and returncode != 0:
+        reason = 'pdflatex failed with exit code ' + str(returncode)
+    _update_status(file, snapshot, lambda status: _finish(status, reason))
+
+
+if __name__ == '__main__':
+    round = int(sys.argv[2])
+    run(sys.argv[1], None if round < 0 else round, sys.argv[3])
@@ -0,0 +1,435 @@
+# Maximum weight matching in general graphs with Edmonds' blossom algorithm.
+#
+# Used by the swiss system to find the games of a round in polynomial time.
+# Vertices are numbered 0 .. n-1, edges are given as (i, j, weight) tuples
+# with integer weights. The implementation follows the primal-dual method
+# described in Z. Galil, "Efficient algorithms for finding maximum matching
+# in graphs", ACM Computing Surveys, 1986, and runs in O(n^3).
+
+
+def max_weight_matching(edges, max_cardinality=False, check=None):
+    # returns a list "mate", such that mate[i] == j if vertex i is matched to
+    # vertex j and mate[i] == -1 if vertex i is not matched.
+    # If max_cardinality is true, only maximum-cardinality matchings are
+    # considered as solutions.
+    # check() is called before each stage and can stop the matching by
+    # raising an exception.
+    if not edges:
+        return []
+
+    number_of_edges = len(edges)
+    number_of_vertices = 0
+    for i, j, _ in edges:
+        number_of_vertices = max(number_of_vertices, i + 1, j + 1)
+    nv = number_of_vertices
+
+    max_weight = max(0, max(w for _, _, w in edges))
+
+    # endpoint[p] is the vertex to which endpoint p is attached, edge k has
+    # the endpoints 2k and 2k+1
+    endpoint = [edges[p // 2][p % 2] for p in range(2 * number_of_edges)]
+
+    # neighbour_ends[v] is the list of remote endpoints of the edges attached
+    # to vertex v
+    neighbour_ends = [[] for _ in range(nv)]
+    for k, (i, j, _) in enumerate(edges):
+        neighbour_ends[i].append(2 * k + 1)
+        neighbour_ends[j].append(2 * k)
+
+    # mate[v] is the remote endpoint of the matched edge of v or -1
+    mate = nv * [-1]
+
+    # label[b] is 0 (free), 1 (S-vertex/blossom) or 2 (T-vertex/blossom)
+    label = (2 * nv) * [0]
+    # label_end[b] is the remote endpoint of the edge through which b got its
+    # label or -1
+    label_end = (2 * nv) * [-1]
+    # in_blossom[v] is the top-level blossom to which vertex v belongs
+    in_blossom = list(range(nv))
+    blossom_parent = (2 * nv) * [-1]
+    blossom_children = (2 * nv) * [None]
+    blossom_base = list(range(nv)) + nv * [-1]
+    blossom_endpoints = (2 * nv) * [None]
+    # best_edge[b] is the least-slack edge to a different S-blossom
+    best_edge = (2 * nv) * [-1]
+    blossom_best_edges = (2 * nv) * [None]
+    unused_blossoms = list(range(nv, 2 * nv))
+    dual_var = nv * [max_weight] + nv * [0]
+    allow_edge = number_of_edges * [False]
+    queue = []
+
+    def slack(k):
+        i, j, w = edges[k]
+        return dual_var[i] + dual_var[j] - 2 * w
+
+    def blossom_leaves(b):
+        if b < nv:
+            yield b
+        else:
+            for t in blossom_children[b]:
+                if t < nv:
+                    yield t
+                else:
+                    yield from blossom_leaves(t)
+
+    def assign_label(w, t, p):
+        b = in_blossom[w]
+        label[w] = label[b] = t
+        label_end[w] = label_end[b] = p
+        best_edge[w] = best_edge[b] = -1
+        if t == 1:
+            queue.extend(blossom_leaves(b))
+        elif t == 2:
+            base = blossom_base[b]
+            assign_label(endpoint[mate[base]], 1, mate[base] ^ 1)
+
+    def scan_blossom(v, w):
+        # trace back from v and w to find a new blossom or an augmenting path,
+        # returns the base vertex of the blossom or -1
+        path = []
+        base = -1
+        while v != -1 or w != -1:
+            b = in_blossom[v]
+            if label[b] & 4:
+                base = blossom_base[b]
+                break
+            path.append(b)
+            label[b] = 5
+            if label_end[b] == -1:
+                v = -1
+            else:
+                v = endpoint[label_end[b]]
+                b = in_blossom[v]
+                v = endpoint[label_end[b]]
+            if w != -1:
+                v, w = w, v
+        for b in path:
+            label[b] = 1
+        return base
+
+    def add_blossom(base, k):
+        v, w, _ = edges[k]
+        bb = in_blossom[base]
+        bv = in_blossom[v]
+        bw = in_blossom[w]
+        b = unused_blossoms.pop()
+        blossom_base[b] = base
+        blossom_parent[b] = -1
+        blossom_parent[bb] = b
+        blossom_children[b] = path = []
+        blossom_endpoints[b] = endps = []
+        while bv != bb:
+            blossom_parent[bv] = b
+            path.append(bv)
+            endps.append(label_end[bv])
+            v = endpoint[label_end[bv]]
+            bv = in_blossom[v]
+        path.append(bb)
+        path.reverse()
+        endps.reverse()
+        endps.append(2 * k)
+        while bw != bb:
+            blossom_parent[bw] = b
+            path.append(bw)
+            endps.append(label_end[bw] ^ 1)
+            w = endpoint[label_end[bw]]
+            bw = in_blossom[w]
+        label[b] = 1
+        label_end[b] = label_end[bb]
+        dual_var[b] = 0
+        for v in blossom_leaves(b):
+            if label[in_blossom[v]] == 2:
+                queue.append(v)
+            in_blossom[v] = b
+
+        # compute the least-slack edges to neighbouring S-blossoms
+        best_edge_to = (2 * nv) * [-1]
+        for bv in path:
+            if blossom_best_edges[bv] is None:
+                neighbour_lists = [[p // 2 for p in neighbour_ends[v]]
+                                   for v in blossom_leaves(bv)]
+            else:
+                neighbour_lists = [blossom_best_edges[bv]]
+            for neighbour_list in neighbour_lists:
+                for k in neighbour_list:
+                    i, j, _ = edges[k]
+                    if in_blossom[j] == b:
+                        i, j = j, i
+                    bj = in_blossom[j]
+                    if bj != b and label[bj] == 1 and (
+                            best_edge_to[bj] == -1
+                            or slack(k) < slack(best_edge_to[bj])):
+                        best_edge_to[bj] = k
+            blossom_best_edges[bv] = None
+            best_edge[bv] = -1
+        blossom_best_edges[b] = [k for k in best_edge_to if k != -1]
+        best_edge[b] = -1
+        for k in blossom_best_edges[b]:
+            if best_edge[b] == -1 or slack(k) < slack(best_edge[b]):
+                best_edge[b] = k
+
+    def expand_blossom(b, end_stage):
+        for s in blossom_children[b]:
+            blossom_parent[s] = -1
+            if s < nv:
+                in_blossom[s] = s
+            elif end_stage and dual_var[s] == 0:
+                expand_blossom(s, end_stage)
+            else:
+                for v in blossom_leaves(s):
+                    in_blossom[v] = s
+
+        # an expanded T-blossom needs its sub-blossoms relabeled
+        if not end_stage and label[b] == 2:
+            entry_child = in_blossom[endpoint[label_end[b] ^ 1]]
+            j = blossom_children[b].index(entry_child)
+            if j & 1:
+                j -= len(blossom_children[b])
+                j_step = 1
+                endpoint_trick = 0
+            else:
+                j_step = -1
+                endpoint_trick = 1
+            p = label_end[b]
+            while j != 0:
+                label[endpoint[p ^ 1]] = 0
+                label[endpoint[blossom_endpoints[b][j - endpoint_trick]
+                               ^ endpoint_trick ^ 1]] = 0
+                assign_label(endpoint[p ^ 1], 2, p)
+                allow_edge[blossom_endpoints[b][j - endpoint_trick] // 2] = \
+                    True
+                j += j_step
+                p = blossom_endpoints[b][j - endpoint_trick] ^ endpoint_trick
+                allow_edge[p // 2] = True
+                j += j_step
+            bv = blossom_children[b][j]
+            label[endpoint[p ^ 1]] = label[bv] = 2
+            label_end[endpoint[p ^ 1]] = label_end[bv] = p
+            best_edge[bv] = -1
+            j += j_step
+            while blossom_children[b][j] != entry_child:
+                bv = blossom_children[b][j]
+                if label[bv] == 1:
+                    j += j_step
+                    continue
+                for v in blossom_leaves(bv):
+                    if label[v] != 0:
+                        break
+                if label[v] != 0:
+                    label[v] = 0
+                    label[endpoint[mate[blossom_base[bv]]]] = 0
+                    assign_label(v, 2, label_end[v])
+                j += j_step
+
+        label[b] = label_end[b] = -1
+        blossom_children[b] = blossom_endpoints[b] = None
+        blossom_base[b] = -1
+        blossom_best_edges[b] = None
+        best_edge[b] = -1
+        unused_blossoms.append(b)
+
+    def augment_blossom(b, v):
+        # swap matched/unmatched edges along the even path from v to the base
+        # of blossom b
+        t = v
+        while blossom_parent[t] != b:
+            t = blossom_parent[t]
+        if t >= nv:
+            augment_blossom(t, v)
+        i = j = blossom_children[b].index(t)
+        if i & 1:
+            j -= len(blossom_children[b])
+            j_step = 1
+            endpoint_trick = 0
+        else:
+            j_step = -1
+            endpoint_trick = 1
+        while j != 0:
+            j += j_step
+            t = blossom_children[b][j]
+            p = blossom_endpoints[b][j - endpoint_trick] ^ endpoint_trick
+            if t >= nv:
+                augment_blossom(t, endpoint[p])
+            j += j_step
+            t = blossom_children[b][j]
+            if t >= nv:
+                augment_blossom(t, endpoint[p ^ 1])
+            mate[endpoint[p]] = p ^ 1
+            mate[endpoint[p ^ 1]] = p
+        blossom_children[b] = blossom_children[b][i:] + \
+            blossom_children[b][:i]
+        blossom_endpoints[b] = blossom_endpoints[b][i:] + \
+            blossom_endpoints[b][:i]
+        blossom_base[b] = blossom_base[blossom_children[b][0]]
+
+    def augment_matching(k):
+        v, w, _ = edges[k]
+        for s, p in ((v, 2 * k + 1), (w, 2 * k)):
+            while True:
+                bs = in_blossom[s]
+                if bs >= nv:
+                    augment_blossom(bs, s)
+                mate[s] = p
+                if label_end[bs] == -1:
+                    break
+                t = endpoint[label_end[bs]]
+                bt = in_blossom[t]
+                s = endpoint[label_end[bt]]
+                j = endpoint[label_end[bt] ^ 1]
+                if bt >= nv:
+                    augment_blossom(bt, j)
+                mate[j] = label_end[bt]
+                p = label_end[bt] ^ 1
+
+    # each stage augments the matching by one edge
+    for _ in range(nv):
+        if check is not None:
+            check()
+        label[:] = (2 * nv) * [0]
+        best_edge[:] = (2 * nv) * [-1]
+        blossom_best_edges[nv:] = nv * [None]
+        allow_edge[:] = number_of_edges * [False]
+        queue[:] = []
+
+        for v in range(nv):
+            if mate[v] == -1 and label[in_blossom[v]] == 0:
+                assign_label(v, 1, -1)
+
+        augmented = False
+        while True:
+            while queue and not augmented:
+                v = queue.pop()
+                for p in neighbour_ends[v]:
+                    k = p // 2
+                    w = endpoint[p]
+                    if in_blossom[v] == in_blossom[w]:
+                        continue
+                    if not allow_edge[k]:
+                        k_slack = slack(k)
+                        if k_slack <= 0:
+                            allow_edge[k] = True
+                    if allow_edge[k]:
+                        if label[in_blossom[w]] == 0:
+                            assign_label(w, 2, p ^ 1)
+                        elif label[in_blossom[w]] == 1:
+                            base = scan_blossom(v, w)
+                            if base >= 0:
+                                add_blossom(base, k)
+                            else:
+                                augment_matching(k)
+                                augmented = True
+                                break
+                        elif label[w] == 0:
+                            label[w] = 2
+                            label_end[w] = p ^ 1
+                    elif label[in_blossom[w]] == 1:
+                        b = in_blossom[v]
+                        if best_edge[b] == -1 or k_slack < slack(best_edge[b]):
+                            best_edge[b] = k
+                    elif label[w] == 0:
+                        if best_edge[w] == -1 or k_slack < slack(best_edge[w]):
+                            best_edge[w] = k
+
+            if augmented:
+                break
+
+            # no augmenting path found, so update the dual variables
+            delta_type = -1
+            delta = delta_edge = delta_blossom = None
+
+            if not max_cardinality:
+                delta_type = 1
+                delta = min(dual_var[:nv])
+
+            for v in range(nv):
+                if label[in_blossom[v]] == 0 and best_edge[v] != -1:
+                    d = slack(best_edge[v])
+                    if delta_type == -1 or d < delta:
+                        delta = d
+                        delta_type = 2
+                        delta_edge = best_edge[v]
+
+            for b in range(2 * nv):
+                if blossom_parent[b] == -1 and label[b] == 1 and \
+                        best_edge[b] != -1:
+                    d = slack(best_edge[b]) // 2
+                    if delta_type == -1 or d < delta:
+                        delta = d
+                        delta_type = 3
+                        delta_edge = best_edge[b]
+
+            for b in range(nv, 2 * nv):
+                if blossom_base[b] >= 0 and blossom_parent[b] == -1 and \
+                        label[b] == 2 and (delta_type == -1
+                                           or dual_var[b] < delta):
+                    delta = dual_var[b]
+                    delta_type = 4
+                    delta_blossom = b
+
+            if delta_type == -1:
+                # no further improvement possible, max cardinality reached
+                delta_type = 1
+                delta = max(0, min(dual_var[:nv]))
+
+            for v in range(nv):
+                if label[in_blossom[v]] == 1:
+                    dual_var[v] -= delta
+                elif label[in_blossom[v]] == 2:
+                    dual_var[v] += delta
+            for b in range(nv, 2 * nv):
+                if blossom_base[b] >= 0 and blossom_parent[b] == -1:
+                    if label[b] == 1:
+                        dual_var[b] += delta
+                    elif label[b] == 2:
+                        dual_var[b] -= delta
+
+            if delta_type == 1:
+                break
+            elif delta_type == 2:
+                allow_edge[delta_edge] = True
+                i, j, _ = edges[delta_edge]
+                if label[in_blossom[i]] == 0:
+                    i, j = j, i
+                queue.append(i)
+            elif delta_type == 3:
+                allow_edge[delta_edge] = True
+                i, j, _ = edges[delta_edge]
+                queue.append(i)
+            elif delta_type == 4:
+                expand_blossom(delta_blossom, False)
+
+        if not augmented:
+            break
+
+        # expand all S-blossoms with zero dual at the end of a stage
+        for b in range(nv, 2 * nv):
+            if blossom_parent[b] == -1 and blossom_base[b] >= 0 and \
+                    label[b] == 1 and dual_var[b] == 0:
+                expand_blossom(b, True)
+
+    for v in range(nv):
+        if mate[v] >= 0:
+            mate[v] = endpoint[mate[v]]
+
+    return mate
+
+
+def min_cost_perfect_matching(number_of_vertices, edges, check=None):
+    # edges are (i, j, cost) tuples. Returns the mate list of a perfect
+    # matching with minimal total cost or None if there is no perfect
+    # matching.
+    if number_of_vertices == 0:
+        return []
+    if number_of_vertices % 2 == 1 or not edges:
+        return None
+
+    # maximising (max_cost + 1 - cost) over maximum-cardinality matchings
+    # minimises the cost of a perfect matching
+    max_cost = max(c for _, _, c in edges)
+    mate = max_weight_matching([(i, j, max_cost + 1 - c)
+                                for i, j, c in edges],
+                               max_cardinality=True, check=check)
+    mate += (number_of_vertices - len(mate)) * [-1]
+    if any(m == -1 for m in mate):
+        return None
+    return mate
@@ -2,30 +2,66 @@ from data.model import Tournament, Team
 from data.data_connector import save, load
 from controller import swiss_system
 from controller import export
+from controller import export_worker
 from controller.errors import NoTeamsError
 
 
 _open_tournament = None
+# tournament kept in memory by the shell. Commands for it use it instead of
+# loading the tournament and it is only saved with checkpoint.
+_session_tournament = None
 
 
 def create_tournament(name, points_fr_win=13, points_fr_loss=0):
     global _open_tournament
     _open_tournament = Tournament(name=name, points_fr_win=points_fr_win,
                            points_fr_loss=points_fr_loss)
-    save(_open_tournament)
+    # replaces an existing tournament with the same name
+    save(_open_tournament, merge=False)
 
 
 def load_tournament(name):
     global _open_tournament
-    _open_tournament = load(name)
+    if _session_tournament is not None and _session_tournament.id == name:
+        _open_tournament = _session_tournament
+    else:
+        _open_tournament = load(name)
 
 
 def close_tournament():
     global _open_tournament
-    save(_open_tournament)
+    # nothing to write for read-only commands
+    if _open_tournament is not _session_tournament and \
+            _open_tournament.is_modified():
+        save(_open_tournament)
     _open_tournament = None
 
 
+def open_session(name):
+    global _session_tournament
+    _session_tournament = load(name)
+
+
+def checkpoint():
+    # saves the tournament of the shell, if it has been changed. If the
+    # tournament has been saved by another process in the meantime, the
+    # saved tournament with the changes of the shell is used from now on.
+    global _session_tournament
+    if _session_tournament.is_modified():
+        _session_tournament = save(_session_tournament)
+
+
+def reload_session():
+    # discards all changes since the last checkpoint
+    open_session(_session_tournament.id)
+
+
+def close_session():
+    global _session_tournament
+    checkpoint()
+    _session_tournament = None
+
+
 def add_team(name, performance_value=-1):
     if _open_tournament is not None and not _open_tournament.is_started():
         team = Team(name=name, performance_value=performance_value)
@@ -37,17 +73,18 @@ def remove_team(team=None, name=''):
         if team is not None:
             _open_tournament.remove_team(team)
         elif name != '':
-            for t in _open_tournament.teams:
-                if t.name == name:
-                    _open_tournament.remove_team(t)
+            t = _open_tournament.get_team_by_name(name)
+            if t is None:
+                raise ValueError
+            _open_tournament.remove_team(t)
 
 
-def start_tournament():
+def start_tournament(search=None):
     if _open_tournament is not None and not _open_tournament.is_started():
         if len(_open_tournament.teams) == 0:
             raise NoTeamsError
         swiss_system.check_and_fix_initial_performance_values(_open_tournament)
-        swiss_system.calculate_next_round(_open_tournament)
+        swiss_system.calculate_next_round(_open_tournament, search)
 
 
 def stop_tournament():
@@ -58,38 +95,69 @@ def stop_tournament():
 def revert_round():
     if _open_tournament is not None \
             and len(_open_tournament.rounds) > 0:
-        _open_tournament.rounds.pop()
+        _open_tournament.pop_round()
         swiss_system.calculate_standings(_open_tournament)
         
 
 def add_result(game, points_a, points_b):
-    game.add_result(points_a, points_b)
+    _open_tournament.add_result(game, points_a, points_b)
+    swiss_system.update_standings_for_game(_open_tournament, game)
 
 
 def calculate_standings():
-    swiss_system.calculate_standings(_open_tournament)
+    # standings are updated with every result, so they only have to be
+    # calculated if something else changed
+    if not _open_tournament.standings_valid:
+        swiss_system.calculate_standings(_open_tournament)
+
 
+def verify_standings():
+    return swiss_system.verify_standings(_open_tournament)
 
-def calculate_next_round():
-    swiss_system.calculate_next_round(_open_tournament)
+
+def calculate_next_round(search=None):
+    swiss_system.calculate_next_round(_open_tournament, search)
+
+
+def estimate_remaining_rounds():
+    return swiss_system.estimate_remaining_rounds(_open_tournament)
+
+
+# export 
+def export_round(round_number, format='pdf', background=False):
+    if _open_tournament is not None:
+        if background:
+            export_worker.start_export(_open_tournament, round_number, format)
+        else:
+            export.export_round(_open_tournament, round_number, format)
 
 
 # export 
-def export_round(round_number):
+def export_standings(format='pdf', background=False):
     if _open_tournament is not None:
-        export.export_round(_open_tournament, round_number)
+        if background:
+            export_worker.start_export(_open_tournament, None, format)
+        else:
+            export.export_standings(_open_tournament, format)
 
 
 # export 
-def export_standings():
+def export_all(jobs=None, format='pdf'):
     if _open_tournament is not None:
-        export.export_standings(_open_tournament)
+        return export.export_all(_open_tournament, jobs, format)
+    return []
+
+
+# export 
+def get_export_status(name):
+    # the tournament does not have to be loaded for this
+    return export_worker.get_status(name)
 
 
 # some status checks
 def check_team_already_exists(name):
     if _open_tournament is not None:
-        return name in [x.name for x in _open_tournament.teams]
+        return _open_tournament.get_team_by_name(name) is not None
     return False
 
 
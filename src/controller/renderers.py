@@ -0,0 +1,64 @@
+import csv
+import html
+
+
+# Export formats, which do not need LaTeX. A renderer writes a table to
+# outfile. It gets the title, the subtitle, the column names and the rows of
+# the table (see tables), which are written as they are generated.
+
+# html exports reload themselves, so they can be shown on a screen while
+# they are exported again
+_refresh_seconds = 30
+
+
+def render_html(outfile, title, subtitle, columns, rows):
+    outfile.write('\n'.join([
+        '<!DOCTYPE html>',
+        '<html>',
+        '<head>',
+        '<meta charset="utf-8">',
+        '<meta http-equiv="refresh" content="' + str(_refresh_seconds) + '">',
+        '<title>' + html.escape(title + ' - ' + subtitle) + '</title>',
+        '<style>',
+        'body { font-family: sans-serif; margin: 2em; }',
+        'table { border-collapse: collapse; }',
+        'th, td { padding: 0.3em 1em; border-bottom: 1px solid #ccc; '
+        'text-align: left; }',
+        'tr:nth-child(even) { background: #f4f4f4; }',
+        '</style>',
+        '</head>',
+        '<body>',
+        '<h1>' + html.escape(title) + '</h1>',
+        '<h2>' + html.escape(subtitle) + '</h2>',
+        '<table>',
+        '<tr>' + ''.join('<th>' + html.escape(c) + '</th>'
+                         for c in columns) + '</tr>']) + '\n')
+    for row in rows:
+        outfile.write('<tr>' + ''.join('<td>' + html.escape(str(v)) + '</td>'
+                                       for v in row) + '</tr>\n')
+    outfile.write('</table>\n</body>\n</html>\n')
+
+
+def render_csv(outfile, title, subtitle, columns, rows):
+    writer = csv.writer(outfile, lineterminator='\n')
+    writer.writerow(columns)
+    writer.writerows(rows)
+
+
+def render_markdown(outfile, title, subtitle, columns, rows):
+    outfile.write('# ' + title + '\n\n' + subtitle + '\n\n')
+    outfile.write(_get_markdown_row(columns))
+    outfile.write('|' + '---|' * len(columns) + '\n')
+    for row in rows:
+        outfile.write(_get_markdown_row(row))
+
+
+def _get_markdown_row(values):
+    return '| ' + ' | '.join(str(v).replace('|', '\\|') for v in values) + \
+        ' |\n'
+
+
+# renderer and file ending of each format
+renderers = {'html': (render_html, '.html'),
+             'csv': (render_csv, '.csv'),
+             'markdown': (render_markdown, '.md')}
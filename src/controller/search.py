@@ -0,0 +1,67 @@
+from concurrent.futures import ProcessPoolExecutor
+from threading import Timer
+
+from controller.errors import SearchBudgetExpiredError
+
+
+class PairingSearch:
+    # keeps track of a pairing search: number of explored nodes, the quality
+    # of the best round found so far and an optional time budget in seconds.
+    # The budget is enforced by a background timer, the search checks it
+    # whenever it visits a node.
+    # With more than one worker, independent parts of the search are solved
+    # in parallel by a pool of worker processes.
+    def __init__(self, time_budget=None, workers=1):
+        self.time_budget = time_budget
+        self.workers = max(1, workers)
+        self.nodes = 0
+        self.best_quality = None
+        self.expired = False
+        self._timer = None
+        self._executor = None
+
+    def start(self):
+        if self.time_budget is not None:
+            self._timer = Timer(self.time_budget, self._expire)
+            self._timer.daemon = True
+            self._timer.start()
+        if self.workers > 1:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._executor is not None:
+            # matchings, which are still running, are not needed anymore. The
+            # executor has no public way to stop them, so its processes are
+            # terminated.
+            processes = list((self._executor._processes or {}).values())
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
+            self._executor = None
+
+    def get_executor(self):
+        return self._executor
+
+    def has_budget(self):
+        return self.time_budget is not None
+
+    def visit(self):
+        self.nodes += 1
+        self.check()
+
+    def check(self):
+        if self.expired:
+            raise SearchBudgetExpiredError
+
+    def found(self, quality):
+        # lower quality values are better
+        if self.best_quality is None or quality < self.best_quality:
+            self.best_quality = quality
+
+    def _expire(self):
+        self.expired = True
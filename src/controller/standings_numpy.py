@@ -0,0 +1,93 @@
+# Standings backend, which calculates all statistics with NumPy matrix
+# operations. NumPy is optional, the pure python implementation in
+# swiss_system is the reference and used if NumPy is not installed.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def is_available():
+    return np is not None
+
+
+def calculate_standings(tournament):
+    # calculates wins, losses, points, BH, FBH, SB, Koya and free rounds of
+    # all teams and returns the teams sorted by the standing keys 1. - 5. and
+    # 7. - 10. (see swiss_system.calculate_standings_for_all_teams)
+    teams = tournament.teams
+    number_of_teams = len(teams)
+    index = {t.name: i for i, t in enumerate(teams)}
+
+    # one row for each team in each finished game:
+    # team, opponent, won, opponent lost against team, points, points against,
+    # free round (opponent is -1, if it is not a team of the tournament)
+    rows = []
+    for r in tournament.rounds:
+        for g in r.games:
+            if not g.is_finished():
+                continue
+            free_round = g.is_free_round()
+            winner = g.get_winner()
+            looser = g.get_looser()
+            for name, opponent, points, points_against in (
+                    (g.team_a, g.team_b, g.points_a, g.points_b),
+                    (g.team_b, g.team_a, g.points_b, g.points_a)):
+                if name not in index:
+                    continue
+                won = winner == name
+                rows.append((index[name], index.get(opponent, -1), won,
+                             won and looser in index, points, points_against,
+                             free_round, index.get(looser, -1)))
+
+    wins = np.zeros(number_of_teams, dtype=np.int64)
+    losses = np.zeros(number_of_teams, dtype=np.int64)
+    points = np.zeros(number_of_teams, dtype=np.int64)
+    points_against = np.zeros(number_of_teams, dtype=np.int64)
+    free_rounds = np.zeros(number_of_teams, dtype=np.int64)
+    # adjacency[i, j]: finished games between team i and team j
+    # won_against[i, j]: finished games team i won and team j lost
+    adjacency = np.zeros((number_of_teams, number_of_teams), dtype=np.int64)
+    won_against = np.zeros((number_of_teams, number_of_teams),
+                           dtype=np.int64)
+
+    if len(rows) > 0:
+        data = np.array(rows, dtype=np.int64)
+        team, opponent, won = data[:, 0], data[:, 1], data[:, 2]
+        np.add.at(wins, team, won)
+        np.add.at(losses, team, 1 - won)
+        np.add.at(points, team, data[:, 4])
+        np.add.at(points_against, team, data[:, 5])
+        np.add.at(free_rounds, team, data[:, 6])
+
+        has_opponent = opponent >= 0
+        np.add.at(adjacency, (team[has_opponent], opponent[has_opponent]), 1)
+
+        beaten = data[:, 3] == 1
+        np.add.at(won_against, (team[beaten], data[beaten, 7]), 1)
+
+    bh = adjacency.dot(wins)
+    fbh = adjacency.dot(bh)
+    sb = won_against.dot(wins)
+    koya = adjacency.dot(
+        np.where(wins >= len(tournament.rounds) / 2, wins, 0))
+
+    for i, t in enumerate(teams):
+        t.wins = int(wins[i])
+        t.losses = int(losses[i])
+        t.points = int(points[i])
+        t.points_against = int(points_against[i])
+        t.fl = int(free_rounds[i])
+        t.bh = int(bh[i])
+        t.fbh = int(fbh[i])
+        t.sb = int(sb[i])
+        t.koya = int(koya[i])
+
+    # lexsort is stable and sorts by the last key first, negated keys give
+    # the same descending order as the python implementation
+    performance_values = np.array([t.performance_value for t in teams],
+                                  dtype=np.int64)
+    order = np.lexsort((-performance_values, free_rounds, -points,
+                        -(points - points_against), -koya, -sb, -fbh, -bh,
+                        -wins))
+    return [teams[i] for i in order]
@@ -1,16 +1,23 @@
 from operator import attrgetter
 from collections import Counter
-from itertools import permutations
+from concurrent.futures import wait
 import random
 import logging
+import os
 
 from data.model import Tournament, Team, Game, Round
 from controller.helper import get_games_of_team, get_game_of_teams
-from controller.errors import NoMatchError
+from controller.errors import NoMatchError, SearchBudgetExpiredError
+from controller.search import PairingSearch
+from controller.matching import min_cost_perfect_matching
+from controller import standings_numpy
 
 
 __logger = logging.getLogger('swiss_system')
 
+# seconds between checks of the time budget while waiting for a worker
+_poll_interval = 0.05
+
 
 def check_and_fix_initial_performance_values(tournament):
     # first check whether there is already a correct ranking
@@ -87,8 +94,11 @@ def _shift_performance_values(teams, value, threshold):
             t.performance_value = t.performance_value + value
 
 
-def calculate_next_round(tournament):
-    calculate_standings(tournament)
+def calculate_next_round(tournament, search=None):
+    if search is None:
+        search = PairingSearch()
+    if not tournament.standings_valid:
+        calculate_standings(tournament)
     rnd = Round()
     teams = sorted(tournament.teams, key=attrgetter('position'))
     
@@ -96,10 +106,12 @@ def calculate_next_round(tournament):
         game_id = len(tournament.rounds) * len(tournament.rounds[0].games) + 1
 
         # determine free round
+        free_round_team = None
         if len(tournament.teams) % 2 == 1:
             min_free_rounds = min([t.fl for t in teams])
             for t in reversed(teams):
                 if (t.fl == min_free_rounds):
+                    free_round_team = t
                     t.fl = t.fl + 1
                     game = Game(game_id, t, None, tournament.points_fr_win,
                                 tournament.points_fr_loss)
@@ -110,55 +122,65 @@ def calculate_next_round(tournament):
 
         # case if there are no teams...
         if len(list(teams)) == 0:
-            tournament.rounds.append(rnd)
+            tournament.add_round(rnd)
             return
 
         # used for fallback if pool matching fails
         teams_without_free_round = list(teams)
         game_id_fallback = game_id
+        # pool matching changes hl and games_against_hl of teams, which has
+        # to be undone, if the fallback is used
+        hl_values = [(t, t.hl, t.games_against_hl) for t in teams]
+
+        games = None
+        if search.has_budget():
+            # anytime search: start with a round, which is cheap to find, and
+            # try to improve it with the pool system until the time budget
+            # expires
+            games = _match_teams_fast(tournament, teams_without_free_round,
+                                      game_id_fallback)
+            if games is not None:
+                search.found(get_round_quality(tournament, games))
 
-        # go through all pools (teams with same number of wins) and
-        # determine games
-        max_wins = max([t.wins for t in teams])
-        min_wins = min([t.wins for t in teams])
-
-        games = []
-
-        for wins in range(max_wins, min_wins - 1, -1):
-            pool = [x for x in teams if x.wins == wins]
-
-            hl_candidates = sorted([x for x in teams if x.wins == wins - 1],
-                                   key=attrgetter('hl', 'position'))
+        try:
+            pool_games = _match_pools(tournament, teams, game_id, search)
+        except SearchBudgetExpiredError:
+            __logger.info('Time budget expired. Use best round found so '
+                          'far.')
+            _reset_hl_values(hl_values)
+        except NoMatchError:
+            # not possible to find matches for a pool
+            # abandon pool system and try to find any possible way for next
+            # round
+            __logger.info('Pool system does not produce valid round.' 
+                          'Try any possibility for matches.')
+            _reset_hl_values(hl_values)
+            try:
+                games = match_teams_greedy(tournament,
+                                           teams_without_free_round,
+                                           game_id_fallback, search)
+            except SearchBudgetExpiredError:
+                __logger.info('Time budget expired. Use best round found '
+                              'so far.')
+            except NoMatchError:
+                # there is no way to pair the remaining teams
+                _print_no_valid_round(tournament, free_round_team)
+                return
+        else:
+            games = pool_games
+            search.found(get_round_quality(tournament, games))
 
+        if games is None:
+            # the time budget expired before any round has been found. A
+            # round has to be found anyway, so this is not limited.
             try:
-                games_in_pool = match_pool(tournament, pool, hl_candidates,
-                                            game_id)
-                game_id += len(games_in_pool)
-                games += games_in_pool
-            except:
-                # not possible to find matches for a pool
-                # abandon pool system and try to find any possible way for next
-                # round
-                __logger.info('Pool system does not produce valid round.' 
-                              'Try any possibility for matches.')
-                try:
-                    games = match_teams_greedy(tournament, 
-                                    teams_without_free_round, game_id_fallback)
-                except NoMatchError:
-                    __logger.error('No valid round could be determined.')
-                    print('No valid round could be determined. Maybe you want '
-                          'to play too many rounds for too few teams? '
-                          'Usually no match between two teams is repeated.')
-                    return
-                break
-            else:
-                # remove already matched teams from list of teams
-                #for team_a, team_b in [(tournament.get_team_by_name(g.team_a), tournament.get_team_by_name(g.team_b)) for g in rnd.games]:
-                for team in [tournament.get_team_by_name(g.team_a) for g in rnd.games] + [tournament.get_team_by_name(g.team_b) for g in rnd.games]:
-                    try:
-                        teams.remove(team)
-                    except ValueError:
-                        pass
+                games = match_teams_greedy(tournament,
+                                           teams_without_free_round,
+                                           game_id_fallback)
+            except NoMatchError:
+                # there is no way to pair the remaining teams
+                _print_no_valid_round(tournament, free_round_team)
+                return
 
         rnd.games += games
         
@@ -183,96 +205,300 @@ def calculate_next_round(tournament):
                            'No match possible in first round.')      
             raise NoMatchError
 
-    tournament.rounds.append(rnd)
+    tournament.add_round(rnd)
+
+
+def check_next_round_possible(tournament, teams):
+    # whether the teams can be paired without repeating a game. If the
+    # number of teams is uneven, one of the teams with the fewest free
+    # rounds gets the free round.
+    number_of_vertices, edges = _get_unplayed_graph(tournament, teams)
+    return min_cost_perfect_matching(number_of_vertices, edges) is not None
+
+
+def estimate_remaining_rounds(tournament, limit=10):
+    # returns a lower and an upper bound for the number of rounds, which can
+    # still be played without repeating a game. The lower bound is found by
+    # pairing rounds one after another and stops at limit. The upper bound
+    # is the smallest number of remaining opponents of a team.
+    teams = tournament.teams
+    if len(teams) < 2:
+        return 0, 0
+    number_of_vertices, edges = _get_unplayed_graph(tournament, teams)
+
+    degrees = len(teams) * [0]
+    for i, j, _ in edges:
+        for v in (i, j):
+            if v < len(teams):
+                degrees[v] += 1
+    upper = min(degrees)
+
+    lower = 0
+    while lower < min(upper, limit):
+        mate = min_cost_perfect_matching(number_of_vertices, edges)
+        if mate is None:
+            if lower == 0:
+                # not even the next round is possible
+                upper = 0
+            break
+        edges = [(i, j, c) for i, j, c in edges if mate[i] != j]
+        lower += 1
+
+    return lower, upper
+
+
+def _get_unplayed_graph(tournament, teams):
+    # graph of all pairs of teams, which have not played against each
+    # other. For an uneven number of teams, there is an additional vertex for
+    # the free round connected to all teams with the fewest free rounds.
+    edges = _get_edges(tournament, teams, lambda i, j: 0)
+    number_of_vertices = len(teams)
+    if number_of_vertices % 2 == 1:
+        min_free_rounds = min([t.fl for t in teams])
+        edges += [(i, number_of_vertices, 0) for i, t in enumerate(teams)
+                  if t.fl == min_free_rounds]
+        number_of_vertices += 1
+    return number_of_vertices, edges
+
+
+def _match_pools(tournament, teams, game_id, search):
+    # go through all pools (teams with same number of wins) and
+    # determine games
+    teams = list(teams)
+    max_wins = max([t.wins for t in teams])
+    min_wins = min([t.wins for t in teams])
+
+    games = []
 
+    for wins in range(max_wins, min_wins - 1, -1):
+        pool = [x for x in teams if x.wins == wins]
 
-def match_pool(tournament, pool, hl_candidates, game_id):
+        hl_candidates = sorted([x for x in teams if x.wins == wins - 1],
+                               key=attrgetter('hl', 'position'))
+
+        games_in_pool = match_pool(tournament, pool, hl_candidates, game_id,
+                                   search)
+        game_id += len(games_in_pool)
+        games += games_in_pool
+
+        # remove already matched teams from list of teams
+        for team in [tournament.get_team_by_name(g.team_a)
+                     for g in games_in_pool] + \
+                    [tournament.get_team_by_name(g.team_b)
+                     for g in games_in_pool]:
+            try:
+                teams.remove(team)
+            except ValueError:
+                pass
+
+    return games
+
+
+def _reset_hl_values(hl_values):
+    for team, hl, games_against_hl in hl_values:
+        team.hl = hl
+        team.games_against_hl = games_against_hl
+
+
+def _print_no_valid_round(tournament, free_round_team):
+    # only called after the pairing has failed, so checking whether another
+    # team could have the free round does not slow down the usual case
+    if free_round_team is not None:
+        free_round_team.fl = free_round_team.fl - 1
+    __logger.error('No valid round possible.')
+    if free_round_team is not None and \
+            check_next_round_possible(tournament, tournament.teams):
+        print('No valid round possible with {} having the free '
+              'round. All other teams have played against each '
+              'other too often.'.format(free_round_team.name))
+    else:
+        print('No valid round possible. Every possible round would '
+              'repeat a game between two teams. No more rounds can '
+              'be played.')
+
+
+def get_round_quality(tournament, games):
+    # number of wins between the teams of all games, lower is better
+    quality = 0
+    for g in games:
+        team_a = tournament.get_team_by_name(g.team_a)
+        team_b = tournament.get_team_by_name(g.team_b)
+        if team_a is not None and team_b is not None:
+            quality += abs(team_a.wins - team_b.wins)
+    return quality
+
+
+def match_pool(tournament, pool, hl_candidates, game_id, search=None):
     try: 
         # if uneven number, one team plays against a team with less
         # wins. Take best team from next pool that has not played in a 
         # higher pool before.
         if len(pool) % 2 == 1:
-            return _match_pool_uneven(tournament, pool, hl_candidates, game_id)
+            return _match_pool_uneven(tournament, pool, hl_candidates, game_id,
+                                      search)
         else:
-            return _match_pool_even(tournament, pool, game_id)
+            return _match_pool_even(tournament, pool, game_id, search)
     except NoMatchError:
         raise NoMatchError
 
 
-def _match_pool_uneven(tournament, pool, hl_candidates, game_id):
-    
-    games = []
-
+def _match_pool_uneven(tournament, pool, hl_candidates, game_id,
+                       search=None):
     # there is an uneven number of teams in the pool
-    # go through all candidates
-    while len(hl_candidates) > 0:
-        hl_candidate = hl_candidates.pop(0)
 
-        # find opponent for that team
-        candidates_for_hl = sorted(pool, key=lambda x: (x.games_against_hl,
-                                                        x.position * -1))
+    # preferred opponents for the hl candidate
+    candidates_for_hl = sorted(pool, key=lambda x: (x.games_against_hl,
+                                                    x.position * -1))
 
-        # go through all possible opponents
-        while len(candidates_for_hl) > 0:
-            team_a = candidates_for_hl.pop(0)
-            if get_game_of_teams(tournament, team_a, hl_candidate) is None:
-                game = Game(game_id, team_a, hl_candidate)
-                game_id += 1
-                games.append(game)
-
-                tmp_pool = list(pool)
-                tmp_pool.remove(team_a)
-                # try to match the rest
-                try:
-                    games += _match_pool_even(tournament, tmp_pool, game_id)
-                except NoMatchError:
-                    # that did not work out, so try the next
-                    game_id -= 1
-                    games.pop()
-                    continue
-                else:
-                    # matching worked
-                    hl_candidate.hl += 1
-                    team_a.games_against_hl += 1
-                    return games
+    # fast path: the most preferred opponent of the first candidate and the
+    # rest of the pool split in two. The matching below would choose the
+    # same games in this case.
+    if len(hl_candidates) > 0:
+        if search is not None:
+            search.visit()
+        try:
+            return _match_pool_uneven_half_split(
+                tournament, pool, candidates_for_hl, hl_candidates[0],
+                game_id)
+        except NoMatchError:
+            pass
+
+    pool_edges = _get_edges(tournament, candidates_for_hl, lambda i, j: 0)
+    hl_index = len(candidates_for_hl)
+
+    # go through all candidates, in parallel search several candidates at
+    # once, but still use the first one in order that works
+    batch_size = 1 if search is None else search.workers
+    while len(hl_candidates) > 0:
+        batch = hl_candidates[:batch_size]
+        del hl_candidates[:batch_size]
+
+        # find the most preferred opponent, for which the rest of the pool
+        # can still be matched. Only the game against the hl candidate has a
+        # cost, so the matching only picks a less preferred opponent, if there
+        # is no other way.
+        problems = []
+        for hl_candidate in batch:
+            edges = [(i, hl_index, i)
+                     for i, team_a in enumerate(candidates_for_hl)
+                     if get_game_of_teams(tournament, team_a,
+                                          hl_candidate) is None]
+            if len(edges) == 0:
+                problems.append(None)
             else:
+                problems.append((hl_index + 1, edges + pool_edges))
+
+        for hl_candidate, mate in zip(batch, _solve_matchings(problems,
+                                                              search)):
+            if mate is None:
                 continue
-    
+
+            team_a = candidates_for_hl[mate[hl_index]]
+            games = [Game(game_id, team_a, hl_candidate)]
+
+            tmp_pool = list(pool)
+            tmp_pool.remove(team_a)
+            # the rest of the pool has a perfect matching, so this cannot fail
+            games += _match_pool_even(tournament, tmp_pool, game_id + 1,
+                                      search)
+
+            hl_candidate.hl += 1
+            team_a.games_against_hl += 1
+            return games
+
     # no possible matching with all candidates
     raise NoMatchError
+
+
+def _match_pool_uneven_half_split(tournament, pool, candidates_for_hl,
+                                  hl_candidate, game_id):
+    for team_a in candidates_for_hl:
+        if get_game_of_teams(tournament, team_a, hl_candidate) is None:
+            break
+    else:
+        raise NoMatchError
+
+    tmp_pool = list(pool)
+    tmp_pool.remove(team_a)
+    games = [Game(game_id, team_a, hl_candidate)]
+    games += _match_teams_half_split_iteration(
+        tournament, tmp_pool[:len(tmp_pool)//2], tmp_pool[len(tmp_pool)//2:],
+        game_id + 1)
+
+    hl_candidate.hl += 1
+    team_a.games_against_hl += 1
+    return games
+
+
+def _solve_matchings(problems, search):
+    # yields the solutions of the matching problems (number of vertices,
+    # edges) in order, None stands for a problem without a solution. If the
+    # search has worker processes, all problems are solved in parallel and
+    # the remaining ones are cancelled as soon as the caller stops iterating.
+    executor = None if search is None else search.get_executor()
+    if executor is None:
+        for problem in problems:
+            if problem is None:
+                yield None
+                continue
+            yield min_cost_perfect_matching(
+                *problem, None if search is None else search.visit)
+        return
+
+    futures = []
+    for problem in problems:
+        if problem is not None:
+            search.visit()
+            futures.append(executor.submit(min_cost_perfect_matching,
+                                           *problem))
+        else:
+            futures.append(None)
+    try:
+        for future in futures:
+            if future is None:
+                yield None
+                continue
+            # the budget is checked while waiting for the worker
+            while not wait([future], timeout=_poll_interval).done:
+                search.check()
+            yield future.result()
+    finally:
+        for future in futures:
+            if future is not None:
+                future.cancel()
         
 
-def _match_pool_even(tournament, pool, game_id):
+def _match_pool_even(tournament, pool, game_id, search=None):
     # first try two split
     try:
-        return match_teams_half_split(tournament, pool, game_id)
+        return match_teams_half_split(tournament, pool, game_id, search)
     except NoMatchError:
         # split did not work, so try greedy
         try:
-            return match_teams_greedy(tournament, pool, game_id)
+            return match_teams_greedy(tournament, pool, game_id, search)
         except NoMatchError:
             # that did not work either...
             raise NoMatchError
 
 
-def match_teams_half_split(tournament, teams, game_id):
+def match_teams_half_split(tournament, teams, game_id, search=None):
     upper_half = teams[:len(teams)//2]
     lower_half = teams[len(teams)//2:]
 
-    # permute lower half and try to match them with upper half
-    for l in [l for l in permutations(lower_half)]:   
-        try:
-            games = _match_teams_half_split_iteration(tournament, upper_half,
-                                              l, game_id)
-        except NoMatchError:
-            # go on with next iteration         
-            continue
-        else:
-            # there were all valid matches, so we can end the loop by 
-            # returning all games
-            return games
+    # fast path: 1. of upper half against 1. of lower half and so on
+    try:
+        return _match_teams_half_split_iteration(tournament, upper_half,
+                                                 lower_half, game_id)
+    except NoMatchError:
+        pass
 
-    raise NoMatchError
+    # otherwise only teams of the upper half play against teams of the lower
+    # half, and each team should play against a team, which is as close as
+    # possible to its counterpart in the other half
+    half = len(upper_half)
+    return _match_teams(tournament, teams, game_id,
+                        lambda i, j: (j - i - half) ** 2
+                        if i < half <= j else None, search)
 
 
 def _match_teams_half_split_iteration(tournament, upper_half, lower_half,
@@ -289,39 +515,71 @@ def _match_teams_half_split_iteration(tournament, upper_half, lower_half,
     return games
 
 
-def match_teams_greedy(tournament, teams, game_id):
-    games = []
-
-    for per_teams in [perm for perm in permutations(teams)]:
-        try:
-            games = _match_teams_greedy_iteration(tournament, per_teams, 
-                                                  game_id)
-        except NoMatchError:
-            continue
-        else:
-            return games
-    
-    raise NoMatchError
-
+def _match_teams_fast(tournament, teams, game_id):
+    # a round found without a matching: the half split or each team in
+    # order against the next team it has not played yet. None if neither
+    # works.
+    try:
+        return _match_teams_half_split_iteration(
+            tournament, teams[:len(teams)//2], teams[len(teams)//2:], game_id)
+    except NoMatchError:
+        pass
 
-def _match_teams_greedy_iteration(tournament, teams, game_id):
     games = []
     teams = list(teams)
     while len(teams) > 0:
         team_a = teams.pop(0)
         for team_b in teams:
             if get_game_of_teams(tournament, team_a, team_b) is None:
-                game = Game(game_id, team_a, team_b)
+                games.append(Game(game_id, team_a, team_b))
                 game_id += 1
-                games.append(game)                
                 teams.remove(team_b)
                 break
-        else:  # no break so there was no match
-            raise NoMatchError
+        else:
+            return None
+    return games
+
+
+def match_teams_greedy(tournament, teams, game_id, search=None):
+    # any team can play against any team it has not played before, but teams
+    # close to each other in the list are preferred
+    return _match_teams(tournament, teams, game_id,
+                        lambda i, j: (j - i) ** 2, search)
+
+
+def _match_teams(tournament, teams, game_id, cost, search=None):
+    # find games for all teams with a minimum cost perfect matching on the
+    # graph of teams, which have not played against each other yet.
+    # cost(i, j) with i < j returns the cost of a game between teams[i] and
+    # teams[j] or None, if this game is not allowed.
+    # the search is checked in every stage of the matching, so a time budget
+    # can stop it
+    mate = min_cost_perfect_matching(
+        len(teams), _get_edges(tournament, teams, cost),
+        None if search is None else search.visit)
+    if mate is None:
+        raise NoMatchError
+
+    games = []
+    for i, team_a in enumerate(teams):
+        if mate[i] > i:
+            games.append(Game(game_id, team_a, teams[mate[i]]))
+            game_id += 1
 
     return games
 
 
+def _get_edges(tournament, teams, cost):
+    edges = []
+    for i, team_a in enumerate(teams):
+        for j in range(i + 1, len(teams)):
+            c = cost(i, j)
+            if c is not None and \
+                    get_game_of_teams(tournament, team_a, teams[j]) is None:
+                edges.append((i, j, c))
+    return edges
+
+
 def _move_hl_team_to_end(candidates, min_games_against_hl):
     if len(candidates) % 2 == 1:
         min_games_against_hl = min(candidates,
@@ -332,7 +590,22 @@ def _move_hl_team_to_end(candidates, min_games_against_hl):
                 break
 
 
-def calculate_standings(tournament):
+def calculate_standings(tournament, backend=None):
+    if backend is None:
+        backend = os.environ.get('TOURNAMENT_MANAGER_STANDINGS', 'python')
+
+    if backend == 'numpy':
+        if standings_numpy.is_available():
+            # statistics and sorting as matrix operations, direct comparison
+            # is applied to the sorted teams as usual
+            standing = standings_numpy.calculate_standings(tournament)
+            calculate_standings_for_all_teams(tournament, standing)
+            tournament.standings_valid = True
+            tournament.set_modified()
+            return
+        __logger.warning('NumPy is not installed. Use python standings '
+                         'backend.')
+
     # wins and points
     for team in tournament.teams:
         calculate_wins_and_points_for_team(tournament, team)
@@ -350,6 +623,61 @@ def calculate_standings(tournament):
         calculate_koya_for_team(tournament, team)
 
     calculate_standings_for_all_teams(tournament)
+    tournament.standings_valid = True
+    tournament.set_modified()
+
+
+def update_standings_for_game(tournament, game):
+    # update the standings after the result of a game has been entered or
+    # overwritten. Only the statistics, which depend on the game are
+    # recalculated: wins and points of the two teams, BH, SB and Koya of
+    # their opponents and FBH of the opponents of the opponents.
+    if not tournament.standings_valid:
+        calculate_standings(tournament)
+        return
+
+    teams = [t for t in (tournament.get_team_by_name(game.team_a),
+                         tournament.get_team_by_name(game.team_b))
+             if t is not None]
+
+    for team in teams:
+        calculate_wins_and_points_for_team(tournament, team)
+
+    changed_wins = _get_teams_and_opponents(tournament, teams)
+    for team in changed_wins:
+        calculate_bh_for_team(tournament, team)
+        calculate_sb_for_team(tournament, team)
+        calculate_koya_for_team(tournament, team)
+
+    for team in _get_teams_and_opponents(tournament, changed_wins):
+        calculate_fbh_for_team(tournament, team)
+
+    calculate_standings_for_all_teams(tournament)
+    tournament.set_modified()
+
+
+def _get_teams_and_opponents(tournament, teams):
+    result = {team.name: team for team in teams}
+    for team in teams:
+        for g in get_games_of_team(tournament, team):
+            opponent = tournament.get_team_by_name(g.get_opponent(team))
+            if opponent is not None:
+                result[opponent.name] = opponent
+    return list(result.values())
+
+
+def verify_standings(tournament):
+    # recalculate all standings from scratch and return the names of all
+    # teams, whose statistics or position differed from the stored ones
+    before = {t.name: _get_standing_of_team(t) for t in tournament.teams}
+    calculate_standings(tournament)
+    return [t.name for t in tournament.teams
+            if before[t.name] != _get_standing_of_team(t)]
+
+
+def _get_standing_of_team(team):
+    return (team.position, team.wins, team.losses, team.bh, team.fbh,
+            team.sb, team.koya, team.points, team.points_against, team.fl)
 
 
 def calculate_wins_and_points_for_team(tournament, team):
@@ -412,7 +740,7 @@ def calculate_koya_for_team(tournament, team):
                 team.koya += opponent.wins
 
 
-def calculate_standings_for_all_teams(tournament):
+def calculate_standings_for_all_teams(tournament, standing=None):
     # 1. Wins
     # 2. BH
     # 3. FBH
@@ -431,9 +759,11 @@ def calculate_standings_for_all_teams(tournament):
     # Only for the final standings this becomes unfair, but also very
     # unlikely to play any role.
 
-    # 1. - 5. and 7. - 10. can be done with simple sorting
-    standing = sorted(tournament.teams, key=_sort_teams_for_standing_key,
-                      reverse=True)
+    # 1. - 5. and 7. - 10. can be done with simple sorting, unless the teams
+    # are already sorted by a different backend
+    if standing is None:
+        standing = sorted(tournament.teams, key=_sort_teams_for_standing_key,
+                          reverse=True)
 
     # 6. direct comparison
     # direct comparison only, if there are exactly two teams with equal
@@ -0,0 +1,64 @@
+from itertools import islice
+from operator import attrgetter
+
+
+# Rows of the tables of a round and of the standings, which are shown by the
+# cli and exported in all formats. The values are not formatted, a missing
+# value is ''. Rows are generated one at a time, so large tables are written
+# without building them in memory.
+
+round_columns = ['Number', 'Team A', 'Team B', 'Points A', 'Points B']
+standings_columns = ['Position', 'Team', 'Matches', 'Wins', 'Losses', 'BH',
+                     'FBH', 'SB', 'Koya', 'Points difference', 'Points',
+                     'Points against', 'FR', 'PV']
+
+rows_per_page = 50
+
+
+def get_round_rows(tournament, round):
+    for g in tournament.rounds[round].games:
+        finished = g.is_finished()
+        yield [g.id, g.team_a, 'free' if g.team_b is None else g.team_b,
+               g.points_a if finished else '',
+               g.points_b if finished else '']
+
+
+def get_standings_rows(tournament):
+    for t in sorted(tournament.teams, key=attrgetter('position')):
+        yield [t.position, t.name, t.wins + t.losses, t.wins, t.losses, t.bh,
+               t.fbh, t.sb, t.koya, t.points - t.points_against, t.points,
+               t.points_against, t.fl, t.performance_value]
+
+
+def get_page(rows, page=None, top=None):
+    # the first top rows or the rows of the page (starting with 1)
+    if top is not None:
+        return islice(rows, max(top, 0))
+    if page is not None:
+        page = max(page, 1)
+        return islice(rows, (page - 1) * rows_per_page, page * rows_per_page)
+    return rows
+
+
+def write_text(outfile, columns, rows, widths):
+    # writes the rows as a table with aligned columns. widths are the minimal
+    # widths of the columns, a column is as wide as its name or its longest
+    # value plus a gap. The widths are computed in one pass over the rows,
+    # before any row is written. Numbers are right aligned, except in the
+    # first column.
+    widths = [max(w, len(c) + 2) for c, w in zip(columns, widths)]
+    table = []
+    for row in rows:
+        table.append(row)
+        for i, value in enumerate(row):
+            length = len(str(value)) + 2
+            if length > widths[i]:
+                widths[i] = length
+
+    outfile.write(''.join('{:{}}'.format(c, w)
+                          for c, w in zip(columns, widths)) + '\n')
+    outfile.write('-' * sum(widths) + '\n')
+    for row in table:
+        outfile.write('{:<{}}'.format(row[0], widths[0]) +
+                      ''.join('{:{}}'.format(v, w)
+                              for v, w in zip(row[1:], widths[1:])) + '\n')
@@ -0,0 +1,171 @@
+import json
+import mmap
+import struct
+
+from data.model import Tournament, Team, Round, Game
+
+
+# Compact binary format for archiving tournaments. All numbers are little
+# endian. The file starts with a header, followed by a string table with the
+# tournament name, the team names and the playoffs as json, the team records
+# and the game records sorted by round. Teams and games are referenced by
+# their index in the string table, -1 is no team (free round).
+#
+# header: magic, version, name, playoffs, points_fr_win, points_fr_loss,
+#         standings_valid, sequence, number of rounds, strings, teams and
+#         games, offsets of the strings, teams and games
+# string: length, utf-8 bytes
+# team:   name, position, wins, losses, bh, fbh, sb, koya, points,
+#         points_against, games_against_hl, hl, fl, performance_value
+# game:   round, id, team_a, team_b, points_a, points_b, version
+
+_magic = b'TMBF'
+_version = 1
+_header = struct.Struct('<4sHiiiiBIIIIIIII')
+_string_length = struct.Struct('<I')
+_team = struct.Struct('<14i')
+_game = struct.Struct('<IIiiiiI')
+
+_team_fields = ('position', 'wins', 'losses', 'bh', 'fbh', 'sb', 'koya',
+                'points', 'points_against', 'games_against_hl', 'hl', 'fl',
+                'performance_value')
+
+
+def dumps(data):
+    strings = []
+    index = {}
+
+    def get_index(s):
+        if s is None:
+            return -1
+        if s not in index:
+            index[s] = len(strings)
+            strings.append(s)
+        return index[s]
+
+    name = get_index(data.name)
+    playoffs = len(strings)
+    strings.append(json.dumps(data.playoffs))
+
+    teams = bytearray()
+    for t in data.teams:
+        teams += _team.pack(get_index(t.name),
+                            *(getattr(t, f) for f in _team_fields))
+
+    games = bytearray()
+    number_of_games = 0
+    for i, r in enumerate(data.rounds):
+        for g in r.games:
+            games += _game.pack(i, g.id, get_index(g.team_a),
+                                get_index(g.team_b), g.points_a, g.points_b,
+                                g.version)
+            number_of_games += 1
+
+    string_table = bytearray()
+    for s in strings:
+        encoded = s.encode()
+        string_table += _string_length.pack(len(encoded)) + encoded
+
+    strings_offset = _header.size
+    teams_offset = strings_offset + len(string_table)
+    games_offset = teams_offset + len(teams)
+    header = _header.pack(_magic, _version, name, playoffs,
+                          data.points_fr_win, data.points_fr_loss,
+                          data.standings_valid, data.sequence,
+                          len(data.rounds), len(strings), len(data.teams),
+                          number_of_games, strings_offset, teams_offset,
+                          games_offset)
+    return header + bytes(string_table) + bytes(teams) + bytes(games)
+
+
+def loads(b):
+    header = _Header(b)
+    strings = header.read_strings(b)
+
+    teams = []
+    for record in _team.iter_unpack(header.get_teams(b)):
+        teams.append(Team(strings[record[0]],
+                          **dict(zip(_team_fields, record[1:]))))
+
+    rounds = [Round() for _ in range(header.number_of_rounds)]
+    for r, id, team_a, team_b, points_a, points_b, version in \
+            _game.iter_unpack(header.get_games(b)):
+        rounds[r].games.append(Game(
+            id, strings[team_a] if team_a >= 0 else None,
+            strings[team_b] if team_b >= 0 else None, points_a, points_b,
+            version))
+
+    return Tournament(name=strings[header.name], teams=teams, rounds=rounds,
+                      playoffs=json.loads(strings[header.playoffs]),
+                      points_fr_win=header.points_fr_win,
+                      points_fr_loss=header.points_fr_loss,
+                      standings_valid=bool(header.standings_valid),
+                      sequence=header.sequence)
+
+
+class _Header:
+    def __init__(self, b):
+        (magic, version, self.name, self.playoffs, self.points_fr_win,
+         self.points_fr_loss, self.standings_valid, self.sequence,
+         self.number_of_rounds, self.number_of_strings, self.number_of_teams,
+         self.number_of_games, self.strings_offset, self.teams_offset,
+         self.games_offset) = _header.unpack_from(b)
+        if magic != _magic or version != _version:
+            raise ValueError('Not a tournament file in the binary format.')
+
+    def read_strings(self, b):
+        strings = []
+        offset = self.strings_offset
+        for _ in range(self.number_of_strings):
+            length, = _string_length.unpack_from(b, offset)
+            offset += _string_length.size
+            strings.append(bytes(b[offset:offset + length]).decode())
+            offset += length
+        return strings
+
+    def get_teams(self, b):
+        return b[self.teams_offset:
+                 self.teams_offset + self.number_of_teams * _team.size]
+
+    def get_games(self, b):
+        return b[self.games_offset:
+                 self.games_offset + self.number_of_games * _game.size]
+
+
+class BinaryFile:
+    # Read access to a tournament file in the binary format through mmap.
+    # games() and teams() iterate over the records as tuples without copying
+    # the file or creating model objects. Team names are indexes in names.
+    # The iterators must not be used after the file has been closed.
+    def __init__(self, path):
+        with open(path, 'rb') as infile:
+            self._mmap = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        self._header = _Header(self._view)
+        self.names = self._header.read_strings(self._view)
+        self.name = self.names[self._header.name]
+        self.number_of_rounds = self._header.number_of_rounds
+        self.number_of_teams = self._header.number_of_teams
+        self.number_of_games = self._header.number_of_games
+
+    def games(self):
+        # (round, id, team_a, team_b, points_a, points_b, version)
+        return _game.iter_unpack(self._header.get_games(self._view))
+
+    def teams(self):
+        # (name, position, wins, losses, bh, fbh, sb, koya, points,
+        #  points_against, games_against_hl, hl, fl, performance_value)
+        return _team.iter_unpack(self._header.get_teams(self._view))
+
+    def load(self):
+        return loads(self._view)
+
+    def close(self):
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
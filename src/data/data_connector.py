@@ -1,32 +1,133 @@
-import json
 import os
 from pathlib import Path
 
-from data.json_serializer import DataJSONEncoder, decode_data_json
+from data import json_serializer
+from data import lazy_json
+from data.errors import ConflictError
+from data.helper import write_atomic, lock
+from data import journal
+from data import sqlite_connector
 
 _base = 'tournament-manager'
 _path = 'data'
 _ending = '.json'
+_journal_ending = '.journal'
+_lock_ending = '.lock'
+_database = 'tournaments'
+_database_ending = '.sqlite'
 
+# storage mode, 'json' writes the whole tournament on every save, 'journal'
+# only appends the changes to a journal and writes the whole tournament
+# when the journal becomes too large, 'sqlite' stores all tournaments in one
+# database and only writes the changed rows, 'lazy' writes the whole
+# tournament in sections, which are only loaded when they are used
+_storage = 'TOURNAMENT_MANAGER_STORAGE'
+_max_journal_size = 64 * 1024
 
-def _get_file_path(filename):
+
+def _get_file_path(filename, ending=_ending):
     path = os.environ.get('SNAP_USER_COMMON',
                default=str(Path.home()))
     if 'SNAP_USER_COMMON' in os.environ:
-        return os.path.join(path, _path, filename + _ending)
+        return os.path.join(path, _path, filename + ending)
     else:
-        return os.path.join(path, _base, _path, filename + _ending)
+        return os.path.join(path, _base, _path, filename + ending)
+
+
+def _get_storage():
+    return os.environ.get(_storage, 'json')
+
+
+def exists(id):
+    if _get_storage() == 'sqlite':
+        return os.path.isfile(_get_database_path()) and \
+            sqlite_connector.exists(id, _get_database_path())
+    return os.path.isfile(_get_file_path(id))
+
+
+def _get_database_path():
+    return _get_file_path(_database, _database_ending)
+
+
+def save(data, merge=True):
+    # Several processes can change the same tournament. If another process
+    # has saved the tournament since data has been loaded, the changes of
+    # data are applied to the saved tournament instead (see _merge). Returns
+    # the tournament as it has been saved. With merge=False, data replaces
+    # the saved tournament.
+    os.makedirs(os.path.dirname(_get_file_path(data.id)), exist_ok=True)
+    with lock(_get_file_path(data.id, _lock_ending)):
+        if merge:
+            stored_sequence = _get_sequence(data.id)
+            if stored_sequence is not None and stored_sequence != \
+                    data.sequence - len(data.get_changes()):
+                data = _merge(data, load(data.id))
+        # data replacing the saved tournament is always written completely
+        _save(data, snapshot=not merge)
+    return data
 
 
-def save(data):
+def _merge(data, stored):
+    # Only results can be merged, everything else depends on the state the
+    # change has been made in. A result can only be merged, if no other
+    # result has been entered for the game in the meantime.
+    for change in data.get_changes():
+        if change['change'] != 'add_result':
+            raise ConflictError('The tournament has been changed by someone '
+                                'else.')
+        game = stored.get_game_by_id(change['game'])
+        if game is None or game.version != change['version']:
+            raise ConflictError('The result of game ' + str(change['game']) +
+                                ' has been changed by someone else.')
+        stored.apply_change(change)
+    return stored
+
+
+def _get_sequence(id):
+    # sequence of the saved tournament, None if it has not been saved
+    if _get_storage() == 'sqlite':
+        if not os.path.isfile(_get_database_path()):
+            return None
+        return sqlite_connector.get_sequence(id, _get_database_path())
+
+    if not os.path.isfile(_get_file_path(id)):
+        return None
+    return max(json_serializer.get_sequence(_get_file_path(id)),
+               journal.get_sequence(_get_file_path(id, _journal_ending)))
+
+
+def _save(data, snapshot=False):
+    if _get_storage() == 'sqlite':
+        os.makedirs(os.path.dirname(_get_database_path()), exist_ok=True)
+        sqlite_connector.save(data, _get_database_path())
+        data.clear_changes()
+        return
+
     f = _get_file_path(data.id)
+    j = _get_file_path(data.id, _journal_ending)
     os.makedirs(os.path.dirname(f), exist_ok=True)
 
-    with open(f, 'w') as outfile:
-        json.dump(obj=data, fp=outfile, cls=DataJSONEncoder)
+    if _get_storage() == 'journal' and not snapshot and os.path.isfile(f) \
+            and journal.get_size(j) < _max_journal_size:
+        journal.append(data, j)
+    elif _get_storage() == 'lazy':
+        write_atomic(f, lambda outfile: outfile.write(lazy_json.dumps(data)))
+        journal.remove(j)
+    else:
+        # new snapshot, changes in the journal are older than the snapshot
+        write_atomic(f, lambda outfile: outfile.write(
+            json_serializer.dumps(data)))
+        journal.remove(j)
+
+    data.clear_changes()
 
 
 def load(id):
-    f = _get_file_path(id)
-    with open(f, 'r') as infile:
-        return json.load(fp=infile, object_hook=decode_data_json)
+    if _get_storage() == 'sqlite':
+        if not os.path.isfile(_get_database_path()):
+            raise FileNotFoundError(_get_database_path())
+        return sqlite_connector.load(id, _get_database_path())
+
+    data = lazy_json.load(_get_file_path(id))
+    journal.replay(data, _get_file_path(id, _journal_ending))
+    return data
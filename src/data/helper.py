@@ -0,0 +1,33 @@
+import os
+from contextlib import contextmanager
+
+# file locks are not available on all platforms
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def write_atomic(path, write):
+    # write(outfile) writes the content to a temporary file, which replaces
+    # the file at path only when it is completely written. So a crash never
+    # leaves a partially written file behind.
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as outfile:
+        write(outfile)
+        outfile.flush()
+        os.fsync(outfile.fileno())
+    os.replace(tmp, path)
+
+
+@contextmanager
+def lock(path):
+    # exclusive lock of the file at path, which is created if necessary
+    with open(path, 'a') as lockfile:
+        if fcntl is not None:
+            fcntl.flock(lockfile.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lockfile.fileno(), fcntl.LOCK_UN)
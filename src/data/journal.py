@@ -0,0 +1,81 @@
+import json
+import os
+
+
+# The journal is an append-only file next to the tournament file with one
+# change of the tournament per line (see Tournament.get_changes). The
+# tournament file is a snapshot, the current state is the snapshot plus all
+# changes in the journal with a higher sequence number than the snapshot.
+
+
+def append(data, path):
+    changes = data.get_changes()
+    if len(changes) == 0:
+        return
+
+    _remove_incomplete_line(path)
+    with open(path, 'a') as outfile:
+        for change in changes:
+            outfile.write(json.dumps(change, separators=(',', ':')) + '\n')
+        outfile.flush()
+        os.fsync(outfile.fileno())
+
+
+def replay(data, path):
+    # apply all changes of the journal at path, which are newer than the
+    # snapshot in data
+    if not os.path.isfile(path):
+        return
+
+    with open(path, 'r') as infile:
+        for line in infile:
+            try:
+                change = json.loads(line)
+            except ValueError:
+                # the last line was not written completely
+                break
+            if change['sequence'] > data.sequence:
+                data.apply_change(change)
+    data.clear_changes()
+
+
+def get_sequence(path):
+    # sequence number of the last change in the journal, 0 if it is empty
+    sequence = 0
+    if not os.path.isfile(path):
+        return sequence
+    with open(path, 'r') as infile:
+        for line in infile:
+            try:
+                sequence = json.loads(line)['sequence']
+            except ValueError:
+                break
+    return sequence
+
+
+def _remove_incomplete_line(path):
+    # a crash while appending can leave an incomplete last line, which would
+    # corrupt the next change appended to it
+    if get_size(path) == 0:
+        return
+    with open(path, 'rb+') as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) == b'\n':
+            return
+        f.seek(0)
+        content = f.read()
+        f.truncate(content.rfind(b'\n') + 1)
+
+
+def get_size(path):
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+def remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
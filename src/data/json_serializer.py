@@ -1,8 +1,32 @@
 import json
+import re
 import sys
 
 from data.model import BaseData, Tournament, Team, Round, Game
 
+# orjson is optional and only used to speed up loading and saving
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Tournament files are encoded with a fixed schema: teams are dicts with the
+# fields below and games are lists
+# [id, team_a, team_b, points_a, points_b, version] (version is missing in
+# older files).
+# Files written before the schema was introduced encode every object as a
+# dict with its '_type' and are still decoded.
+_format = 2
+# the sequence follows the format at the start of the file (also in the
+# header of lazy_json), so it can be read without decoding the tournament
+_sequence_pattern = re.compile(
+    rb'\{"_type":"Tournament","format":\d+,"sequence":(\d+),')
+_sequence_prefix_size = 64
+_team_fields = ('name', 'wins', 'losses', 'bh', 'fbh', 'sb', 'koya',
+                'points', 'points_against', 'position', 'games_against_hl',
+                'hl', 'fl', 'performance_value')
+
 
 class DataJSONEncoder(json.JSONEncoder):
     # pylint: disable=E0202
@@ -17,3 +41,101 @@ def decode_data_json(dct):
         cls = getattr(sys.modules[__name__], dct.get('_type'))
         return cls.decode_json(dct)
     return dct
+
+
+def dumps(data):
+    return to_json(encode_tournament(data))
+
+
+def loads(s):
+    return decode_tournament(from_json(s))
+
+
+def to_json(obj):
+    if orjson is not None:
+        return orjson.dumps(obj, default=_encode_default).decode()
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False,
+                      default=_encode_default)
+
+
+def from_json(s):
+    if orjson is not None:
+        return orjson.loads(s)
+    return json.loads(s)
+
+
+def _encode_default(obj):
+    if isinstance(obj, BaseData):
+        return obj.encode_json()
+    raise TypeError('Object of type ' + type(obj).__name__ +
+                    ' is not JSON serializable')
+
+
+def encode_tournament(data):
+    return {'_type': 'Tournament', 'format': _format,
+            'sequence': data.sequence,
+            'name': data.name,
+            'teams': encode_teams(data.teams),
+            'rounds': [encode_games(r.games) for r in data.rounds],
+            'playoffs': data.playoffs,
+            'points_fr_win': data.points_fr_win,
+            'points_fr_loss': data.points_fr_loss,
+            'standings_valid': data.standings_valid}
+
+
+def decode_tournament(dct):
+    if dct.get('format') != _format:
+        return _decode_old(dct)
+
+    teams = decode_teams(dct['teams'])
+    rounds = [Round(games=decode_games(r)) for r in dct['rounds']]
+    return Tournament(name=dct['name'], teams=teams, rounds=rounds,
+                      playoffs=dct['playoffs'],
+                      points_fr_win=dct['points_fr_win'],
+                      points_fr_loss=dct['points_fr_loss'],
+                      standings_valid=dct['standings_valid'],
+                      sequence=dct['sequence'])
+
+
+def get_sequence(path):
+    # sequence of the tournament in the file at path, only older files are
+    # decoded for it
+    with open(path, 'rb') as infile:
+        match = _sequence_pattern.match(infile.read(_sequence_prefix_size))
+        if match is not None:
+            return int(match.group(1))
+        # the first line is the whole tournament or the header of lazy_json
+        infile.seek(0)
+        first = infile.readline()
+        try:
+            dct = from_json(first)
+        except ValueError:
+            # a file written by another program with more than one line
+            dct = from_json(first + infile.read())
+    return dct.get('sequence', 0)
+
+
+def encode_teams(teams):
+    return [{f: getattr(t, f) for f in _team_fields} for t in teams]
+
+
+def decode_teams(lst):
+    return [Team(**t) for t in lst]
+
+
+def encode_games(games):
+    return [[g.id, g.team_a, g.team_b, g.points_a, g.points_b, g.version]
+            for g in games]
+
+
+def decode_games(lst):
+    return [Game(*g) for g in lst]
+
+
+def _decode_old(value):
+    # decodes the objects bottom up like decode_data_json as object_hook
+    if isinstance(value, dict):
+        return decode_data_json({k: _decode_old(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [_decode_old(v) for v in value]
+    return value
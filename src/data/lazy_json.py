@@ -0,0 +1,118 @@
+from data import json_serializer
+from data.model import Tournament, Round
+
+
+# Layout of tournament files, which can be loaded lazily: the first line is
+# a header with the tournament without its teams and games and an offset
+# table of the sections. Each section follows in its own line, first the
+# teams and then the games of each round, encoded like in json_serializer.
+# Offsets are in bytes from the end of the header line. The teams and the
+# games of a round are only read and decoded, when they are accessed.
+#
+# {"_type":"Tournament","format":3,...,"sections":{"teams":[0,100],
+#  "rounds":[[101,200],...]}}
+# [{"name":"a",...},...]
+# [[1,"a","b",13,7],...]
+
+_format = 3
+
+
+def dumps(data):
+    tournament = json_serializer.encode_tournament(data)
+    del tournament['teams']
+    del tournament['rounds']
+    tournament['format'] = _format
+
+    sections = [json_serializer.to_json(
+        json_serializer.encode_teams(data.teams)).encode()]
+    sections.extend(json_serializer.to_json(
+        json_serializer.encode_games(r.games)).encode() for r in data.rounds)
+    offsets = []
+    offset = 0
+    for section in sections:
+        offsets.append([offset, len(section)])
+        offset += len(section) + 1
+    tournament['sections'] = {'teams': offsets[0], 'rounds': offsets[1:]}
+
+    header = json_serializer.to_json(tournament).encode()
+    return (b'\n'.join([header] + sections) + b'\n').decode()
+
+
+def load(path):
+    # loads tournament files of all formats, only files in this layout are
+    # loaded lazily
+    infile = open(path, 'rb')
+    header = infile.readline()
+    try:
+        dct = json_serializer.from_json(header)
+    except ValueError:
+        # a file written by another program with more than one line
+        dct = {}
+    if dct.get('format') != _format:
+        rest = infile.read()
+        infile.close()
+        if dct and not rest.strip():
+            # older formats are one line, which has already been parsed
+            return json_serializer.decode_tournament(dct)
+        return json_serializer.loads(header + rest)
+
+    # the file stays open, so the sections are read from the same file even
+    # if it is replaced by a save in the meantime
+    sections = _Sections(infile, len(header))
+    return LazyTournament(sections, dct)
+
+
+class _Sections:
+    def __init__(self, infile, start):
+        self._infile = infile
+        self._start = start
+
+    def read(self, offset):
+        start, length = offset
+        self._infile.seek(self._start + start)
+        return json_serializer.from_json(self._infile.read(length))
+
+
+class LazyTournament(Tournament):
+    def __init__(self, sections, dct):
+        self._sections = sections
+        self._teams_offset = dct['sections']['teams']
+        super().__init__(name=dct['name'],
+                         rounds=[LazyRound(sections, offset)
+                                 for offset in dct['sections']['rounds']],
+                         playoffs=dct['playoffs'],
+                         points_fr_win=dct['points_fr_win'],
+                         points_fr_loss=dct['points_fr_loss'],
+                         standings_valid=dct['standings_valid'],
+                         sequence=dct['sequence'])
+        self._teams = None
+
+    @property
+    def teams(self):
+        if self._teams is None:
+            self._teams = json_serializer.decode_teams(
+                self._sections.read(self._teams_offset))
+        return self._teams
+
+    @teams.setter
+    def teams(self, teams):
+        self._teams = teams
+
+
+class LazyRound(Round):
+    def __init__(self, sections, offset):
+        self._sections = sections
+        self._offset = offset
+        super().__init__()
+        self._games = None
+
+    @property
+    def games(self):
+        if self._games is None:
+            self._games = json_serializer.decode_games(
+                self._sections.read(self._offset))
+        return self._games
+
+    @games.setter
+    def games(self, games):
+        self._games = games
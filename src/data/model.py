@@ -9,42 +9,183 @@ class BaseData:
 
 
 class Tournament(BaseData):
-    def __init__(self, name, teams=[], rounds=[], playoffs=[],
-                 points_fr_win=13, points_fr_loss=0):
+    def __init__(self, name, teams=None, rounds=None, playoffs=None,
+                 points_fr_win=13, points_fr_loss=0, standings_valid=False,
+                 sequence=0):
         self.id = name
         self.name = name
-        self.teams = teams
-        self.rounds = rounds
-        self.playoffs = playoffs
+        self.teams = teams if teams is not None else []
+        self.rounds = rounds if rounds is not None else []
+        self.playoffs = playoffs if playoffs is not None else []
         self.points_fr_win = points_fr_win
         self.points_fr_loss = points_fr_loss
-        
+        # whether the statistics and positions of the teams are up to date
+        self.standings_valid = standings_valid
+        # number of all changes made to the tournament so far and the
+        # changes since it has been loaded or saved the last time
+        self.sequence = sequence
+        self._changes = []
+        # modified by something else than a recorded change, e.g. the
+        # standings have been recalculated
+        self._modified = False
+
+        # indexes of teams by name, games by id, games by the unordered pair
+        # of team names and lists of games by team name. They are built on
+        # first use, so a lazily loaded tournament does not have to load all
+        # games for commands which do not need them.
+        self._indexed = False
+        self._teams_by_name = {}
+        self._games_by_id = {}
+        self._games_of_pairs = {}
+        self._games_of_teams = {}
+
+    def _check_indexes(self):
+        if self._indexed:
+            return
+        self._indexed = True
+        self._teams_by_name = {t.name: t for t in self.teams}
+        for r in self.rounds:
+            self._add_games_to_index(r.games)
 
     def is_started(self):
         return len(self.rounds) > 0
 
     def reset(self):
+        self._check_indexes()
+        self._record_change({'change': 'reset'})
+        self.standings_valid = False
         self.rounds = []
+        self._games_by_id = {}
+        self._games_of_pairs = {}
+        self._games_of_teams = {}
         for t in self.teams:
             t.reset()
 
+    def add_round(self, round):
+        # free rounds are already finished and the number of rounds is used
+        # for Koya, so the standings have to be recalculated
+        self._check_indexes()
+        self._record_change({
+            'change': 'add_round',
+            'games': [g.encode_json() for g in round.games],
+            'teams': [[t.name, t.performance_value, t.hl, t.games_against_hl]
+                      for t in self.teams]})
+        self.standings_valid = False
+        self.rounds.append(round)
+        self._add_games_to_index(round.games)
+
+    def pop_round(self):
+        self._check_indexes()
+        self._record_change({'change': 'pop_round'})
+        self.standings_valid = False
+        round = self.rounds.pop()
+        for g in round.games:
+            if self._games_by_id.get(g.id) is g:
+                del self._games_by_id[g.id]
+            key = frozenset((g.team_a, g.team_b))
+            if self._games_of_pairs.get(key) is g:
+                del self._games_of_pairs[key]
+            for name in (g.team_a, g.team_b):
+                if name is not None:
+                    self._games_of_teams[name].pop()
+        return round
+
+    def get_game_of_teams(self, team_a, team_b):
+        self._check_indexes()
+        return self._games_of_pairs.get(frozenset((team_a.name, team_b.name)))
+
+    def get_games_of_team(self, team):
+        # the returned list is part of the index and must not be modified.
+        # Results are entered into the same game objects, so it is always up
+        # to date.
+        self._check_indexes()
+        return self._games_of_teams.get(team.name, [])
+
+    def _add_games_to_index(self, games):
+        for g in games:
+            self._games_by_id[g.id] = g
+            if g.team_a is not None and g.team_b is not None:
+                self._games_of_pairs[frozenset((g.team_a, g.team_b))] = g
+            for name in (g.team_a, g.team_b):
+                if name is not None:
+                    self._games_of_teams.setdefault(name, []).append(g)
+
     def add_team(self, team):
+        self._check_indexes()
+        self._record_change({'change': 'add_team',
+                             'team': team.encode_json()})
+        self.standings_valid = False
         self.teams.append(team)
+        self._teams_by_name[team.name] = team
 
     def remove_team(self, team):
+        self._check_indexes()
         self.teams.remove(team)
+        self._record_change({'change': 'remove_team', 'name': team.name})
+        self.standings_valid = False
+        if self._teams_by_name.get(team.name) is team:
+            del self._teams_by_name[team.name]
+
+    def add_result(self, game, points_a, points_b):
+        # the version of the game the result is based on, so a change of the
+        # same game by another process can be detected when saving
+        self._record_change({'change': 'add_result', 'game': game.id,
+                             'points_a': points_a, 'points_b': points_b,
+                             'version': game.version})
+        game.add_result(points_a, points_b)
+
+    def get_changes(self):
+        return self._changes
+
+    def clear_changes(self):
+        self._changes = []
+        self._modified = False
+
+    def set_modified(self):
+        self._modified = True
+
+    def is_modified(self):
+        return self._modified or len(self._changes) > 0
+
+    def _record_change(self, change):
+        self.sequence += 1
+        change['sequence'] = self.sequence
+        self._changes.append(change)
+
+    def apply_change(self, change):
+        # apply a change recorded by another instance of the tournament, e.g.
+        # when replaying a journal. The change is recorded again.
+        name = change['change']
+        if name == 'add_team':
+            self.add_team(Team.decode_json(change['team']))
+        elif name == 'remove_team':
+            self.remove_team(self.get_team_by_name(change['name']))
+        elif name == 'add_round':
+            for team_name, performance_value, hl, games_against_hl in \
+                    change['teams']:
+                team = self.get_team_by_name(team_name)
+                team.performance_value = performance_value
+                team.hl = hl
+                team.games_against_hl = games_against_hl
+            self.add_round(Round(games=[Game.decode_json(g)
+                                        for g in change['games']]))
+        elif name == 'pop_round':
+            self.pop_round()
+        elif name == 'reset':
+            self.reset()
+        elif name == 'add_result':
+            self.add_result(self.get_game_by_id(change['game']),
+                            change['points_a'], change['points_b'])
+        # the statistics of the teams are not part of the changes
+        self.standings_valid = False
 
     def get_game_by_id(self, id):
-        for g in [game for round in self.rounds for game in round.games]:
-            if g.id == id:
-                return g
-        return None
+        self._check_indexes()
+        return self._games_by_id.get(id)
 
     def get_team_by_name(self, id):
-        for t in self.teams:
-            if t.name == id:
-                return t
-        return None
+        self._check_indexes()
+        return self._teams_by_name.get(id)
 
     def encode_json(self):
         dct = {'_type': self.__class__.__name__,
@@ -53,7 +194,9 @@ class Tournament(BaseData):
                'rounds': self.rounds,
                'playoffs': self.playoffs,
                'points_fr_win': self.points_fr_win,
-               'points_fr_loss': self.points_fr_loss}
+               'points_fr_loss': self.points_fr_loss,
+               'standings_valid': self.standings_valid,
+               'sequence': self.sequence}
         return dct
 
     @classmethod
@@ -62,12 +205,14 @@ class Tournament(BaseData):
                           rounds=dct.get('rounds'),
                           playoffs=dct.get('playoffs'),
                           points_fr_win=dct.get('points_fr_win'),
-                          points_fr_loss=dct.get('points_fr_loss'))
+                          points_fr_loss=dct.get('points_fr_loss'),
+                          standings_valid=dct.get('standings_valid', False),
+                          sequence=dct.get('sequence', 0))
 
 
 class Round(BaseData):
-    def __init__(self, games=[]):
-        self.games = games
+    def __init__(self, games=None):
+        self.games = games if games is not None else []
 
     def encode_json(self):
         dct = {'_type': self.__class__.__name__}
@@ -137,7 +282,7 @@ class Team(BaseData):
 
 class Game(BaseData):
     def __init__(self, id=-1, team_a=None, team_b=None, points_a=-1,
-            points_b=-1):
+            points_b=-1, version=0):
         self.id = id
 
         # use string or Team, then just store unique name
@@ -153,6 +298,8 @@ class Game(BaseData):
 
         self.points_a = points_a
         self.points_b = points_b
+        # number of results entered for the game
+        self.version = version
 
     def is_finished(self):
         return self.points_a > -1 and self.points_b > -1
@@ -164,6 +311,7 @@ class Game(BaseData):
     def add_result(self, points_a, points_b):
         self.points_a = points_a
         self.points_b = points_b
+        self.version += 1
 
     def get_winner(self):
         return self.team_a if self.points_a > self.points_b else self.team_b
@@ -202,12 +350,14 @@ class Game(BaseData):
     def encode_json(self):
         dct = {'_type': self.__class__.__name__, 'id': self.id,
                'team_a': self.team_a, 'team_b': self.team_b,
-               'points_a': self.points_a, 'points_b': self.points_b}
+               'points_a': self.points_a, 'points_b': self.points_b,
+               'version': self.version}
         return dct
 
     @classmethod
     def decode_json(cls, dct):
         return Game(id=dct.get('id'), team_a=dct.get('team_a'),
                     team_b=dct.get('team_b'), points_a=dct.get('points_a'),
-                    points_b=dct.get('points_b'))
+                    points_b=dct.get('points_b'),
+                    version=dct.get('version', 0))
 
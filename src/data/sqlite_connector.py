@@ -0,0 +1,303 @@
+import json
+import sqlite3
+from contextlib import closing
+from weakref import WeakKeyDictionary
+
+from data.model import Tournament, Team, Round, Game
+
+
+# All tournaments are stored in one SQLite database. A tournament, which has
+# been loaded or saved before, is saved incrementally: the recorded changes
+# of the tournament (see Tournament.get_changes) are applied to the game rows
+# and only the teams, whose values changed, are written.
+# A loaded tournament only reads the rows of its teams and of each round,
+# when they are accessed. They are read in the same read transaction as the
+# tournament (the database uses write-ahead logging, so it does not block
+# other processes), so they are consistent even if another process saves in
+# the meantime.
+
+_schema = '''
+CREATE TABLE IF NOT EXISTS tournaments (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    points_fr_win INTEGER,
+    points_fr_loss INTEGER,
+    standings_valid INTEGER,
+    sequence INTEGER,
+    number_of_rounds INTEGER,
+    playoffs TEXT
+);
+CREATE TABLE IF NOT EXISTS teams (
+    tournament TEXT,
+    name TEXT,
+    number INTEGER,
+    position INTEGER,
+    wins INTEGER,
+    losses INTEGER,
+    bh INTEGER,
+    fbh INTEGER,
+    sb INTEGER,
+    koya INTEGER,
+    points INTEGER,
+    points_against INTEGER,
+    games_against_hl INTEGER,
+    hl INTEGER,
+    fl INTEGER,
+    performance_value INTEGER,
+    PRIMARY KEY (tournament, name)
+);
+CREATE TABLE IF NOT EXISTS games (
+    tournament TEXT,
+    round INTEGER,
+    number INTEGER,
+    id INTEGER,
+    team_a TEXT,
+    team_b TEXT,
+    points_a INTEGER,
+    points_b INTEGER,
+    version INTEGER DEFAULT 0,
+    PRIMARY KEY (tournament, round, number)
+);
+CREATE INDEX IF NOT EXISTS games_id ON games (tournament, id);
+CREATE INDEX IF NOT EXISTS games_pair ON games (tournament, team_a, team_b);
+'''
+
+_team_columns = ('position', 'wins', 'losses', 'bh', 'fbh', 'sb', 'koya',
+                 'points', 'points_against', 'games_against_hl', 'hl', 'fl',
+                 'performance_value')
+
+# state of the tournaments in the database as it has been loaded or saved by
+# this process: team rows by name and number of rounds
+_stored = WeakKeyDictionary()
+
+
+def _connect(path):
+    connection = sqlite3.connect(path)
+    # readers do not block writers and see a snapshot of the database
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.executescript(_schema)
+    # databases created before games had a version
+    columns = [c[1] for c in connection.execute('PRAGMA table_info(games)')]
+    if 'version' not in columns:
+        connection.execute('ALTER TABLE games ADD COLUMN version INTEGER '
+                           'DEFAULT 0')
+    return connection
+
+
+def _get_team_row(team):
+    return tuple(getattr(team, c) for c in _team_columns)
+
+
+def exists(id, path):
+    with closing(_connect(path)) as connection:
+        row = connection.execute('SELECT 1 FROM tournaments WHERE id = ?',
+                                 (id,)).fetchone()
+    return row is not None
+
+
+def get_sequence(id, path):
+    with closing(_connect(path)) as connection:
+        row = connection.execute(
+            'SELECT sequence FROM tournaments WHERE id = ?', (id,)).fetchone()
+    return row[0] if row is not None else None
+
+
+def save(data, path):
+    with closing(_connect(path)) as connection:
+        with connection:
+            stored = _stored.get(data)
+            if stored is None:
+                stored = _write_all(connection, data)
+            else:
+                # copy, so it stays unchanged if the transaction fails
+                stored = {'teams': dict(stored['teams']),
+                          'rounds': stored['rounds']}
+                _write_changes(connection, data, stored)
+            if not isinstance(data, SqliteTournament) or \
+                    data._teams is not None:
+                # teams, which have not been read, have not been changed
+                _write_teams(connection, data, stored)
+            connection.execute(
+                'INSERT OR REPLACE INTO tournaments VALUES '
+                '(?, ?, ?, ?, ?, ?, ?, ?)',
+                (data.id, data.name, data.points_fr_win, data.points_fr_loss,
+                 data.standings_valid, data.sequence, len(data.rounds),
+                 json.dumps(data.playoffs)))
+    _stored[data] = stored
+
+
+def _write_all(connection, data):
+    # the tournament is not known to be in the database in its last saved
+    # state, so all rows of it are replaced
+    connection.execute('DELETE FROM teams WHERE tournament = ?', (data.id,))
+    connection.execute('DELETE FROM games WHERE tournament = ?', (data.id,))
+    for i, r in enumerate(data.rounds):
+        _insert_round(connection, data, i, r.games)
+    return {'teams': {}, 'rounds': len(data.rounds)}
+
+
+def _write_changes(connection, data, stored):
+    for change in data.get_changes():
+        name = change['change']
+        if name == 'add_round':
+            _insert_round(connection, data, stored['rounds'],
+                          [Game.decode_json(g) for g in change['games']])
+            stored['rounds'] += 1
+        elif name == 'pop_round':
+            stored['rounds'] -= 1
+            connection.execute(
+                'DELETE FROM games WHERE tournament = ? AND round = ?',
+                (data.id, stored['rounds']))
+        elif name == 'reset':
+            stored['rounds'] = 0
+            connection.execute('DELETE FROM games WHERE tournament = ?',
+                               (data.id,))
+        elif name == 'add_result':
+            connection.execute(
+                'UPDATE games SET points_a = ?, points_b = ?, version = ? '
+                'WHERE tournament = ? AND id = ?',
+                (change['points_a'], change['points_b'],
+                 change['version'] + 1, data.id, change['game']))
+        # teams are written by comparing them with the stored rows
+
+
+def _insert_round(connection, data, round_number, games):
+    connection.executemany(
+        'INSERT INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        [(data.id, round_number, i, g.id, g.team_a, g.team_b, g.points_a,
+          g.points_b, g.version) for i, g in enumerate(games)])
+
+
+def _write_teams(connection, data, stored):
+    teams = stored['teams']
+    names = set()
+    next_number = max((n for n, _ in teams.values()), default=-1) + 1
+    for t in data.teams:
+        names.add(t.name)
+        row = _get_team_row(t)
+        number, stored_row = teams.get(t.name, (None, None))
+        if stored_row == row:
+            continue
+        if number is None:
+            number = next_number
+            next_number += 1
+        connection.execute(
+            'INSERT OR REPLACE INTO teams VALUES '
+            '(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (data.id, t.name, number) + row)
+        teams[t.name] = (number, row)
+
+    for name in [n for n in teams if n not in names]:
+        connection.execute(
+            'DELETE FROM teams WHERE tournament = ? AND name = ?',
+            (data.id, name))
+        del teams[name]
+
+
+def load(id, path):
+    connection = _connect(path)
+    # the read transaction stays open for the rows, which are read later
+    connection.execute('BEGIN')
+    tournament_row = connection.execute(
+        'SELECT name, points_fr_win, points_fr_loss, standings_valid, '
+        'sequence, number_of_rounds, playoffs FROM tournaments '
+        'WHERE id = ?', (id,)).fetchone()
+    if tournament_row is None:
+        connection.close()
+        raise FileNotFoundError('Tournament ' + id + ' is not in ' + path)
+    name, points_fr_win, points_fr_loss, standings_valid, sequence, \
+        number_of_rounds, playoffs = tournament_row
+
+    snapshot = _Snapshot(connection, id)
+    data = SqliteTournament(snapshot, name=name,
+                            rounds=[SqliteRound(snapshot, i)
+                                    for i in range(number_of_rounds)],
+                            playoffs=json.loads(playoffs),
+                            points_fr_win=points_fr_win,
+                            points_fr_loss=points_fr_loss,
+                            standings_valid=bool(standings_valid),
+                            sequence=sequence)
+    data.id = id
+    _stored[data] = {'teams': {}, 'rounds': number_of_rounds}
+    return data
+
+
+class _Snapshot:
+    # rows of a tournament as they were, when it has been loaded. The
+    # connection is closed, when the snapshot is not used anymore.
+    def __init__(self, connection, id):
+        self._connection = connection
+        self._id = id
+
+    def read_teams(self):
+        # teams and their rows by name
+        teams = []
+        rows = {}
+        for row in self._connection.execute(
+                'SELECT name, number, ' + ', '.join(_team_columns) +
+                ' FROM teams WHERE tournament = ? ORDER BY number',
+                (self._id,)):
+            teams.append(Team(row[0], **dict(zip(_team_columns, row[2:]))))
+            rows[row[0]] = (row[1], tuple(row[2:]))
+        return teams, rows
+
+    def read_games(self, round):
+        return [Game(*row) for row in self._connection.execute(
+            'SELECT id, team_a, team_b, points_a, points_b, version '
+            'FROM games WHERE tournament = ? AND round = ? ORDER BY number',
+            (self._id, round))]
+
+    def get_round_of_game(self, id):
+        row = self._connection.execute(
+            'SELECT round FROM games WHERE tournament = ? AND id = ?',
+            (self._id, id)).fetchone()
+        return row[0] if row is not None else None
+
+    def __del__(self):
+        self._connection.close()
+
+
+class SqliteTournament(Tournament):
+    def __init__(self, snapshot, **kwargs):
+        self._snapshot = snapshot
+        super().__init__(**kwargs)
+        self._teams = None
+
+    @property
+    def teams(self):
+        if self._teams is None:
+            self._teams, rows = self._snapshot.read_teams()
+            _stored[self]['teams'].update(rows)
+        return self._teams
+
+    @teams.setter
+    def teams(self, teams):
+        self._teams = teams
+
+    def get_game_by_id(self, id):
+        # before the indexes are needed, only the round of the game is read
+        if not self._indexed:
+            round = self._snapshot.get_round_of_game(id)
+            if round is not None and round < len(self.rounds):
+                for g in self.rounds[round].games:
+                    if g.id == id:
+                        return g
+        return super().get_game_by_id(id)
+
+
+class SqliteRound(Round):
+    def __init__(self, snapshot, round):
+        self._snapshot = snapshot
+        self._round = round
+        super().__init__()
+        self._games = None
+
+    @property
+    def games(self):
+        if self._games is None:
+            self._games = self._snapshot.read_games(self._round)
+        return self._games
+
+    @games.setter
+    def games(self, games):
+        self._games = games
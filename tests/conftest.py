@@ -0,0 +1,30 @@
+import pytest
+import sys
+import os
+import json
+
+sys.path.append(os.path.relpath("src/"))
+
+from data.model import Tournament, Round, Team, Game
+from data import json_serializer
+
+
+# fixtures shared by the tests of the file formats
+
+@pytest.fixture
+def tournament():
+    teams = [Team(name=name, wins=i, bh=2 * i, performance_value=i)
+             for i, name in enumerate(['a', 'b', 'c', 'd', 'e'])]
+    rounds = [Round(games=[Game(1, 'a', 'b', 13, 7), Game(2, 'c', 'd', 4, 13),
+                           Game(3, 'e', None, 13, 0)]),
+              Round(games=[Game(4, 'a', 'c'), Game(5, 'b', 'e'),
+                           Game(6, 'd', None, 13, 0)])]
+    return Tournament(name='test', teams=teams, rounds=rounds,
+                      standings_valid=True, sequence=7)
+
+
+@pytest.fixture
+def get_state():
+    # everything stored of a tournament, to compare tournaments
+    return lambda tournament: json.dumps(
+        tournament, cls=json_serializer.DataJSONEncoder)
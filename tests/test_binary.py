@@ -0,0 +1,50 @@
+import pytest
+import sys
+import os
+
+sys.path.append(os.path.relpath("src/"))
+
+from data import binary
+
+
+@pytest.fixture
+def tournament(tournament):
+    # a name with a character, which takes more than one byte in utf-8
+    for team in tournament.teams:
+        team.name = team.name.replace('e', 'eé')
+    for round in tournament.rounds:
+        for game in round.games:
+            if game.team_a == 'e':
+                game.team_a = 'eé'
+            if game.team_b == 'e':
+                game.team_b = 'eé'
+    tournament.points_fr_win = 11
+    return tournament
+
+
+class TestBinary(object):
+
+    def test_round_trip(self, tournament, get_state):
+        decoded = binary.loads(binary.dumps(tournament))
+        assert get_state(decoded) == get_state(tournament)
+
+    def test_read_records(self, tournament, get_state, tmp_path):
+        path = str(tmp_path / 'test.tmb')
+        with open(path, 'wb') as outfile:
+            outfile.write(binary.dumps(tournament))
+
+        with binary.BinaryFile(path) as f:
+            assert f.name == 'test'
+            assert f.number_of_rounds == 2
+            games = list(f.games())
+            assert len(games) == 6
+            assert games[4] == (1, 5, f.names.index('b'),
+                                f.names.index('eé'), -1, -1, 0)
+            assert games[5][3] == -1
+            assert [f.names[t[0]] for t in f.teams()] == \
+                [t.name for t in tournament.teams]
+            assert get_state(f.load()) == get_state(tournament)
+
+    def test_invalid_file(self):
+        with pytest.raises(ValueError):
+            binary.loads(b'{"_type": "Tournament"}' + bytes(64))
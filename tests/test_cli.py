@@ -4,7 +4,10 @@ import os
 
 sys.path.append(os.path.relpath("src/"))
 
-from cli import create_parser, create_tournament
+from cli import create_parser, create_tournament, next_round, enter_results
+from cli import import_teams
+from controller import processes
+from data import data_connector
 
 test_tournament='test'
 
@@ -38,4 +41,146 @@ class TestCli(object):
         args = parser.parse_args([test_tournament, 'create-tournament'])
         print(args)
         assert args.func is create_tournament
-        
\ No newline at end of file
+        
+    def test_parser_next_round_time_budget(self, parser):
+        args = parser.parse_args([test_tournament, 'next-round',
+                                  '--time-budget', '2.5'])
+        assert args.func is next_round
+        assert args.time_budget == [2.5]
+
+    def test_parser_jobs(self, parser):
+        args = parser.parse_args([test_tournament, 'export-all', '-j', '3'])
+        assert args.jobs == [3]
+        for command in ['export-all', 'next-round']:
+            with pytest.raises(SystemExit) as pytest_wrapped_e:
+                parser.parse_args([test_tournament, command, '-j', '0'])
+            assert pytest_wrapped_e.value.code != 0
+
+    def test_parser_pages(self, parser, capsys):
+        for command in ['show-round', 'show-standings']:
+            args = parser.parse_args([test_tournament, command, '--top', '5'])
+            assert args.top == [5]
+            for option in ['--page', '--top']:
+                with pytest.raises(SystemExit) as pytest_wrapped_e:
+                    parser.parse_args([test_tournament, command, option, '0'])
+                assert pytest_wrapped_e.value.code != 0
+                assert 'numbers of rows start at 1' in capsys.readouterr().err
+
+    def test_parser_enter_results(self, parser):
+        args = parser.parse_args([test_tournament, 'enter-results'])
+        assert args.func is enter_results
+        assert args.file == '-'
+        assert not args.overwrite
+
+    def test_enter_results(self, parser, tmp_path, monkeypatch, capsys):
+        monkeypatch.setenv('SNAP_USER_COMMON', str(tmp_path))
+        processes.create_tournament(test_tournament)
+        for name in ['a', 'b', 'c', 'd']:
+            processes.add_team(name)
+        processes.start_tournament()
+        processes._open_tournament.get_game_by_id(2).add_result(13, 1)
+        processes.close_tournament()
+
+        results = tmp_path / 'results.csv'
+        results.write_text('game,a,b\n1,13,4\n2,5,13\n1 7 7\n9 13 0\n')
+        args = parser.parse_args([test_tournament, 'enter-results',
+                                  str(results)])
+        args.func(args)
+        out = capsys.readouterr().out
+        assert 'Line 3:' in out and 'Line 4:' in out and 'Line 5:' in out
+        assert '1 results entered, 3 lines with errors.' in out
+
+        tournament = data_connector.load(test_tournament)
+        assert tournament.get_game_by_id(1).points_b == 4
+        assert tournament.get_game_by_id(2).points_a == 13
+
+        # a mistyped first line is not taken for a header
+        results.write_text('l,13,2\n')
+        args.func(args)
+        out = capsys.readouterr().out
+        assert 'Line 1:' in out
+        assert '0 results entered, 1 lines with errors.' in out
+
+    def test_import_teams(self, parser, tmp_path, monkeypatch, capsys):
+        monkeypatch.setenv('SNAP_USER_COMMON', str(tmp_path))
+        processes.create_tournament(test_tournament)
+        processes.add_team('a', 1)
+        processes.close_tournament()
+
+        teams = tmp_path / 'teams.csv'
+        teams.write_text('name,performance value\nb,2\n"c, d"\na,5\nb,x\n')
+        args = parser.parse_args([test_tournament, 'import-teams',
+                                  str(teams)])
+        assert args.func is import_teams
+        args.func(args)
+        assert '2 teams added, 1 skipped, 1 lines with errors.' in \
+            capsys.readouterr().out
+        tournament = data_connector.load(test_tournament)
+        assert [(t.name, t.performance_value) for t in tournament.teams] == \
+            [('a', 1), ('b', 2), ('c, d', -1)]
+
+        args = parser.parse_args([test_tournament, 'import-teams',
+                                  str(teams), '--overwrite'])
+        args.func(args)
+        tournament = data_connector.load(test_tournament)
+        assert tournament.get_team_by_name('a').performance_value == 5
+        assert len(tournament.teams) == 3
+
+    def test_shell(self, parser, tmp_path, monkeypatch, capsys):
+        monkeypatch.setenv('SNAP_USER_COMMON', str(tmp_path))
+        processes.create_tournament(test_tournament)
+        for name in ['a', 'b', 'c', 'd']:
+            processes.add_team(name)
+        processes.start_tournament()
+        processes.close_tournament()
+
+        lines = iter(['show-round', 'enter-result 1 13 2', 'bogus',
+                      'enter-result 2 "3" 13', 'show-standings', 'exit'])
+        monkeypatch.setattr('builtins.input', lambda prompt: next(lines))
+        loads = []
+        load = data_connector.load
+        monkeypatch.setattr(processes, 'load',
+                            lambda name: loads.append(name) or load(name))
+
+        args = parser.parse_args([test_tournament, 'shell', '-c', '3600'])
+        args.func(args)
+        assert len(loads) == 1
+        assert 'Position' in capsys.readouterr().out
+
+        tournament = data_connector.load(test_tournament)
+        assert tournament.get_game_by_id(1).is_finished()
+        assert tournament.get_game_by_id(2).points_a == 3
+
+    def test_shell_keeps_running_after_errors(self, parser, tmp_path,
+                                              monkeypatch, capsys):
+        monkeypatch.setenv('SNAP_USER_COMMON', str(tmp_path))
+        processes.create_tournament(test_tournament)
+        for name in ['a', 'b', 'c', 'd']:
+            processes.add_team(name)
+        processes.start_tournament()
+        processes.close_tournament()
+
+        def fail(*args):
+            raise FileNotFoundError('template.tex')
+
+        monkeypatch.setattr(processes, 'export_round', fail)
+        lines = iter(['enter-result 1 13 2', 'export-round',
+                      'enter-result 2 3 13'])
+
+        def read(prompt):
+            line = next(lines, None)
+            if line is None:
+                raise KeyboardInterrupt
+            return line
+
+        monkeypatch.setattr('builtins.input', read)
+        args = parser.parse_args([test_tournament, 'shell', '-c', '3600'])
+        with pytest.raises(KeyboardInterrupt):
+            args.func(args)
+        assert 'template.tex' in capsys.readouterr().out
+
+        # saved, although the shell has been stopped
+        tournament = data_connector.load(test_tournament)
+        assert tournament.get_game_by_id(1).is_finished()
+        assert tournament.get_game_by_id(2).is_finished()
+        assert processes._session_tournament is None
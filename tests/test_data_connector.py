@@ -0,0 +1,307 @@
+import pytest
+import sys
+import os
+
+sys.path.append(os.path.relpath("src/"))
+
+from data.model import Tournament, Round, Team, Game
+from data import data_connector
+from data.errors import ConflictError
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.setenv('SNAP_USER_COMMON', str(tmp_path))
+    return tmp_path
+
+
+def _create_tournament():
+    tournament = Tournament(name='test')
+    for name in ['a', 'b', 'c', 'd']:
+        tournament.add_team(Team(name=name))
+    tournament.add_round(Round(games=[Game(1, 'a', 'b'), Game(2, 'c', 'd')]))
+    return tournament
+
+
+def _get_state(tournament):
+    return ([t.encode_json() for t in tournament.teams],
+            [[g.encode_json() for g in r.games] for r in tournament.rounds],
+            tournament.sequence)
+
+
+class TestJournal(object):
+
+    def test_journal_replay(self, storage, monkeypatch):
+        monkeypatch.setenv('TOURNAMENT_MANAGER_STORAGE', 'journal')
+        tournament = _create_tournament()
+        data_connector.save(tournament)
+
+        tournament.add_result(tournament.get_game_by_id(1), 13, 4)
+        tournament.get_team_by_name('a').hl = 1
+        tournament.add_round(Round(games=[Game(3, 'a', 'c')]))
+        data_connector.save(tournament)
+        assert os.path.isfile(data_connector._get_file_path('test',
+                                                            '.journal'))
+
+        loaded = data_connector.load('test')
+        assert _get_state(loaded) == _get_state(tournament)
+        assert not loaded.standings_valid
+        assert loaded.get_changes() == []
+
+        loaded.pop_round()
+        data_connector.save(loaded)
+        assert len(data_connector.load('test').rounds) == 1
+
+    def test_incomplete_journal_line(self, storage, monkeypatch):
+        monkeypatch.setenv('TOURNAMENT_MANAGER_STORAGE', 'journal')
+        tournament = _create_tournament()
+        data_connector.save(tournament)
+        journal_path = data_connector._get_file_path('test', '.journal')
+        with open(journal_path, 'w') as outfile:
+            outfile.write('{"change": "pop_r')
+
+        assert len(data_connector.load('test').rounds) == 1
+        tournament.add_result(tournament.get_game_by_id(2), 3, 13)
+        data_connector.save(tournament)
+        assert data_connector.load('test').get_game_by_id(2).points_b == 13
+
+    def test_snapshot_when_journal_is_large(self, storage, monkeypatch):
+        monkeypatch.setenv('TOURNAMENT_MANAGER_STORAGE', 'journal')
+        monkeypatch.setattr(data_connector, '_max_journal_size', 1)
+        tournament = _create_tournament()
+        data_connector.save(tournament)
+        tournament.add_result(tournament.get_game_by_id(1), 13, 4)
+        data_connector.save(tournament)
+        tournament.add_result(tournament.get_game_by_id(2), 13, 5)
+        data_connector.save(tournament)
+
+        journal_path = data_connector._get_file_path('test', '.journal')
+        assert not os.path.isfile(journal_path)
+        assert _get_state(data_connector.load('test')) == \
+            _get_state(tournament)
+
+    def test_json_storage_uses_journal(self, storage, monkeypatch):
+        monkeypatch.setenv('TOURNAMENT_MANAGER_STORAGE', 'journal')
+        tournament = _create_tournament()
+        data_connector.save(tournament)
+        tournament.add_result(tournament.get_game_by_id(1), 13, 4)
+        data_connector.save(tournament)
+
+        monkeypatch.setenv('TOURNAMENT_MANAGER_STORAGE', 'json')
+        loaded = data_connector.load('test')
+        assert loaded.get_game_by_id(1).points_a == 13
+        data_connector.save(loaded)
+        assert _get_state(data_connector.load('test')) == \
+            _get_state(tournament)
+
+
+class TestSave(object):
+
+    def test_save_is_atomic(self, storage):
+        tournament = _create_tournament()
+        data_connector.save(tournament)
+        path = data_connector._get_file_path('test')
+        assert os.path.isfile(path)
+        assert not os.path.isfile(path + '.tmp')
+        assert _get_state(data_connector.load('test')) == \
+            _get_state(tournament)
+
+    def test_modified(self, storage):
+        tournament = _create_tournament()
+        assert tournament.is_modified()
+        data_connector.save(tournament)
+        assert not tournament.is_modified()
+
+        loaded = data_connector.load('test')
+        assert not loaded.is_modified()
+        loaded.add_result(loaded.get_game_by_id(1), 13, 4)
+        assert loaded.is_modified()
+
+    def test_close_unmodified_tournament(self, storage):
+        from controller import processes
+        tournament = _create_tournament()
+        data_connector.save(tournament)
+        path = data_connector._get_file_path('test')
+        modified = os.path.getmtime(path)
+        os.utime(path, (modified - 10, modified - 10))
+
+        processes.load_tournament('test')
+        processes.close_tournament()
+        assert os.path.getmtime(path) == modified - 10
+
+        processes.load_tournament('test')
+        processes.add_result(
+            processes._open_tournament.get_game_by_id(1), 13, 4)
+        processes.close_tournament()
+        assert os.path.getmtime(path) != modified - 10
+
+
+class TestSqlite(object):
+
+    def test_save_and_load(self, storage, monkeypatch):
+        monkeypatch.setenv('TOURNAMENT_MANAGER_STORAGE', 'sqlite')
+        tournament = _create_tournament()
+        assert not data_connector.exists('test')
+        data_connector.save(tournament)
+        assert data_connector.exists('test')
+        assert not os.path.isfile(data_connector._get_file_path('test'))
+
+        loaded = data_connector.load('test')
+        assert _get_state(loaded) == _get_state(tournament)
+        with pytest.raises(FileNotFoundError):
+            data_connector.load('other')
+
+    def test_incremental_save(self, storage, monkeypatch):
+        monkeypatch.setenv('TOURNAMENT_MANAGER_STORAGE', 'sqlite')
+        data_connector.save(_create_tournament())
+        other = _create_tournament()
+        other.name = other.id = 'other'
+        data_connector.save(other)
+
+        tournament = data_connector.load('test')
+        tournament.add_result(tournament.get_game_by_id(1), 13, 4)
+        tournament.get_team_by_name('a').wins = 1
+        tournament.remove_team(tournament.get_team_by_name('d'))
+        tournament.add_team(Team(name='e'))
+        tournament.add_round(Round(games=[Game(3, 'a', 'c')]))
+        tournament.pop_round()
+        tournament.add_round(Round(games=[Game(3, 'a', 'e')]))
+        data_connector.save(tournament)
+
+        assert _get_state(data_connector.load('test')) == \
+            _get_state(tournament)
+        assert _get_state(data_connector.load('other')) == \
+            _get_state(other)
+
+        tournament.reset()
+        data_connector.save(tournament)
+        assert data_connector.load('test').rounds == []
+
+    def test_load_rounds_on_access(self, storage, monkeypatch):
+        monkeypatch.setenv('TOURNAMENT_MANAGER_STORAGE', 'sqlite')
+        tournament = _create_tournament()
+        tournament.add_round(Round(games=[Game(3, 'a', 'c', 13, 2),
+                                          Game(4, 'b', 'd')]))
+        data_connector.save(tournament)
+
+        loaded = data_connector.load('test')
+        assert len(loaded.rounds) == 2
+        assert loaded.get_game_by_id(4).team_b == 'd'
+        assert loaded.rounds[0]._games is None
+        assert loaded._teams is None
+        assert not loaded._indexed
+
+        # teams, which have not been read, are kept
+        loaded.add_result(loaded.get_game_by_id(4), 5, 13)
+        data_connector.save(loaded)
+        assert _get_state(data_connector.load('test')) == \
+            _get_state(loaded)
+        assert loaded._teams is not None
+
+    def test_read_snapshot(self, storage, monkeypatch):
+        monkeypatch.setenv('TOURNAMENT_MANAGER_STORAGE', 'sqlite')
+        data_connector.save(_create_tournament())
+        loaded = data_connector.load('test')
+
+        other = data_connector.load('test')
+        other.add_result(other.get_game_by_id(1), 13, 4)
+        data_connector.save(other)
+
+        # the rounds are read as they were, when the tournament was loaded
+        assert loaded.get_game_by_id(1).points_a == -1
+        assert data_connector.load('test').get_game_by_id(1).points_a == 13
+
+
+class TestLazy(object):
+
+    def test_load_sections_on_access(self, storage, monkeypatch):
+        monkeypatch.setenv('TOURNAMENT_MANAGER_STORAGE', 'lazy')
+        tournament = _create_tournament()
+        tournament.add_round(Round(games=[Game(3, 'a', 'c', 13, 2),
+                                          Game(4, 'b', 'd')]))
+        data_connector.save(tournament)
+
+        loaded = data_connector.load('test')
+        assert len(loaded.rounds) == 2
+        assert loaded._teams is None
+        assert [g.id for g in loaded.rounds[1].games] == [3, 4]
+        assert loaded.rounds[0]._games is None
+        assert loaded._teams is None
+
+        assert _get_state(loaded) == _get_state(tournament)
+        assert loaded.get_game_by_id(1).team_b == 'b'
+
+    def test_save_loaded_tournament(self, storage, monkeypatch):
+        monkeypatch.setenv('TOURNAMENT_MANAGER_STORAGE', 'lazy')
+        data_connector.save(_create_tournament())
+        loaded = data_connector.load('test')
+        loaded.add_result(loaded.get_game_by_id(2), 4, 13)
+        data_connector.save(loaded)
+
+        monkeypatch.setenv('TOURNAMENT_MANAGER_STORAGE', 'json')
+        assert _get_state(data_connector.load('test')) == _get_state(loaded)
+        data_connector.save(loaded)
+        monkeypatch.setenv('TOURNAMENT_MANAGER_STORAGE', 'lazy')
+        assert _get_state(data_connector.load('test')) == _get_state(loaded)
+
+
+class TestConcurrentChanges(object):
+
+    @pytest.mark.parametrize('mode', ['json', 'journal', 'lazy', 'sqlite'])
+    def test_merge_results(self, storage, monkeypatch, mode):
+        monkeypatch.setenv('TOURNAMENT_MANAGER_STORAGE', mode)
+        data_connector.save(_create_tournament())
+        first = data_connector.load('test')
+        second = data_connector.load('test')
+
+        first.add_result(first.get_game_by_id(1), 13, 4)
+        data_connector.save(first)
+        second.add_result(second.get_game_by_id(2), 7, 13)
+        saved = data_connector.save(second)
+        assert saved is not second
+        assert saved.get_game_by_id(1).points_a == 13
+
+        loaded = data_connector.load('test')
+        assert loaded.get_game_by_id(1).points_a == 13
+        assert loaded.get_game_by_id(2).points_b == 13
+        assert loaded.get_game_by_id(2).version == 1
+        assert not loaded.standings_valid
+
+    @pytest.mark.parametrize('mode', ['json', 'sqlite'])
+    def test_conflicting_results(self, storage, monkeypatch, mode):
+        monkeypatch.setenv('TOURNAMENT_MANAGER_STORAGE', mode)
+        data_connector.save(_create_tournament())
+        first = data_connector.load('test')
+        second = data_connector.load('test')
+
+        first.add_result(first.get_game_by_id(1), 13, 4)
+        data_connector.save(first)
+        second.add_result(second.get_game_by_id(1), 5, 13)
+        with pytest.raises(ConflictError):
+            data_connector.save(second)
+        assert data_connector.load('test').get_game_by_id(1).points_a == 13
+
+    def test_conflicting_round(self, storage):
+        data_connector.save(_create_tournament())
+        first = data_connector.load('test')
+        second = data_connector.load('test')
+
+        first.add_result(first.get_game_by_id(1), 13, 4)
+        data_connector.save(first)
+        second.pop_round()
+        with pytest.raises(ConflictError):
+            data_connector.save(second)
+        assert len(data_connector.load('test').rounds) == 1
+
+    @pytest.mark.parametrize('mode', ['json', 'journal', 'lazy', 'sqlite'])
+    def test_overwrite(self, storage, monkeypatch, mode):
+        monkeypatch.setenv('TOURNAMENT_MANAGER_STORAGE', mode)
+        data_connector.save(_create_tournament())
+        data_connector.save(Tournament(name='test', points_fr_win=7),
+                            merge=False)
+        loaded = data_connector.load('test')
+        assert loaded.teams == []
+        assert loaded.rounds == []
+        assert loaded.points_fr_win == 7
+        assert not os.path.isfile(data_connector._get_file_path('test',
+                                                                '.journal'))
@@ -0,0 +1,225 @@
+import pytest
+import subprocess
+import sys
+import os
+import time
+
+sys.path.append(os.path.relpath("src/"))
+
+from data.model import Tournament, Round, Team, Game
+from controller import export
+from controller import export_worker
+
+
+@pytest.fixture
+def compiled(tmp_path, monkeypatch):
+    # replaces pdflatex, returns the names of the compiled files
+    monkeypatch.setenv('SNAP_USER_COMMON', str(tmp_path))
+    monkeypatch.setenv('SNAP', os.path.abspath('src'))
+    compiled = []
+
+    def generate_export(file, output_directory=None):
+        compiled.append(file)
+        with open(export._get_export_path(file, '.pdf'), 'w') as outfile:
+            outfile.write(str(len(compiled)))
+        return 0
+
+    monkeypatch.setattr(export, '_generate_export', generate_export)
+    return compiled
+
+
+@pytest.fixture
+def tournament():
+    teams = [Team(name=name) for name in ['a', 'b', 'c', 'd']]
+    rnd = Round(games=[Game(1, 'a', 'b'), Game(2, 'c', 'd')])
+    return Tournament(name='test', teams=teams, rounds=[rnd])
+
+
+class TestExport(object):
+
+    def test_cache(self, compiled, tournament):
+        pdf = export._get_export_path('test-r1', '.pdf')
+        export.export_round(tournament, 0)
+        export.export_round(tournament, 0)
+        assert compiled == ['test-r1']
+
+        tournament.add_result(tournament.get_game_by_id(1), 13, 4)
+        export.export_round(tournament, 0)
+        assert len(compiled) == 2
+        with open(pdf, 'r') as infile:
+            assert infile.read() == '2'
+
+        tournament.add_result(tournament.get_game_by_id(1), -1, -1)
+        export.export_round(tournament, 0)
+        assert len(compiled) == 2
+        with open(pdf, 'r') as infile:
+            assert infile.read() == '1'
+
+    def test_cache_size(self, compiled, tournament, monkeypatch):
+        monkeypatch.setattr(export, '_max_cache_entries', 2)
+        for points in range(4):
+            tournament.add_result(tournament.get_game_by_id(1), 13, points)
+            export.export_round(tournament, 0)
+        cache = os.path.dirname(export._get_export_path(
+            os.path.join(export._cache_path, 'x')))
+        assert len(os.listdir(cache)) == 2
+
+    def test_cache_entry_removed_by_parallel_job(self, tmp_path,
+                                                 monkeypatch):
+        monkeypatch.setattr(export, '_max_cache_entries', 1)
+        for i in range(3):
+            (tmp_path / (str(i) + '.pdf')).write_text(str(i))
+            os.utime(str(tmp_path / (str(i) + '.pdf')), (i, i))
+        getmtime = os.path.getmtime
+
+        def remove_and_getmtime(path):
+            # another job removes the entry 1.pdf right before
+            if path.endswith('1.pdf'):
+                os.remove(path)
+            return getmtime(path)
+
+        monkeypatch.setattr(os.path, 'getmtime', remove_and_getmtime)
+        export._remove_old_cache_entries(str(tmp_path))
+        assert os.listdir(str(tmp_path)) == ['2.pdf']
+
+    def test_template_is_loaded_once(self, compiled, tournament):
+        export._templates.clear()
+        export.export_round(tournament, 0)
+        export.export_standings(tournament)
+        assert len(export._templates) == 1
+        assert export._load_template() is export._load_template()
+
+    def test_export_all(self, compiled, tournament):
+        tournament.add_round(Round(games=[Game(3, 'a', 'c'),
+                                          Game(4, 'b', 'd')]))
+        assert export.export_all(tournament, 2) == []
+        assert sorted(compiled) == ['test-r1', 'test-r2', 'test-standings']
+        for file in compiled:
+            assert os.path.isfile(export._get_export_path(file, '.pdf'))
+
+        tournament.add_result(tournament.get_game_by_id(3), 13, 2)
+        assert export.export_all(tournament, 2) == []
+        assert len(compiled) == 4
+
+    def test_export_all_failures(self, compiled, tournament, monkeypatch):
+        def generate_export(file, output_directory=None):
+            if file == 'test-standings':
+                raise FileNotFoundError('pdflatex')
+            return 1
+
+        monkeypatch.setattr(export, '_generate_export', generate_export)
+        failures = export.export_all(tournament)
+        assert [f for f, _ in failures] == ['test-r1', 'test-standings']
+        assert 'exit code 1' in failures[0][1]
+
+    def test_export_all_jobs(self, compiled, tournament, monkeypatch):
+        # by default one job for each processor
+        executor = export.ThreadPoolExecutor
+        workers = []
+
+        def thread_pool_executor(max_workers):
+            workers.append(max_workers)
+            return executor(max_workers=max_workers)
+
+        monkeypatch.setattr(export, 'ThreadPoolExecutor', thread_pool_executor)
+        monkeypatch.setattr(os, 'cpu_count', lambda: 3)
+        assert export.export_all(tournament) == []
+        assert workers == [3]
+
+    @pytest.mark.parametrize('format', ['html', 'csv', 'markdown'])
+    def test_formats_without_latex(self, compiled, tournament, format):
+        tournament.add_result(tournament.get_game_by_id(1), 13, 4)
+        assert export.export_all(tournament, format=format) == []
+        assert compiled == []
+        ending = export.renderers.renderers[format][1]
+        with open(export._get_export_path('test-r1', ending), 'r') as infile:
+            content = infile.read()
+        assert '13' in content and 'Team A' in content
+        assert os.path.isfile(export._get_export_path('test-standings',
+                                                      ending))
+
+    def test_html_is_escaped(self, compiled, tournament):
+        tournament.teams[0].name = '<a & b>'
+        export.export_standings(tournament, 'html')
+        with open(export._get_export_path('test-standings', '.html'),
+                  'r') as infile:
+            content = infile.read()
+        assert '&lt;a &amp; b&gt;' in content
+        assert 'http-equiv="refresh"' in content
+
+    def test_csv(self, compiled, tournament):
+        tournament.add_result(tournament.get_game_by_id(1), 13, 4)
+        export.export_round(tournament, 0, 'csv')
+        with open(export._get_export_path('test-r1', '.csv'), 'r') as infile:
+            assert infile.read().splitlines() == [
+                'Number,Team A,Team B,Points A,Points B',
+                '1,a,b,13,4',
+                '2,c,d,,']
+
+
+class TestBackground(object):
+
+    def wait(self, name):
+        for _ in range(100):
+            states = export_worker.get_status(name)
+            if states and all(s['state'] != 'running' for s in states):
+                return states
+            time.sleep(0.1)
+        return states
+
+    def test_worker(self, compiled, tournament):
+        file = export_worker.start_export(tournament, 0, 'csv')
+        states = self.wait('test')
+        assert [(s['file'], s['state']) for s in states] == [(file, 'done')]
+        assert os.path.isfile(export._get_export_path(file, '.csv'))
+        # the snapshot is removed by the worker
+        jobs = os.path.dirname(export._get_export_path(
+            os.path.join(export._jobs_path, file)))
+        assert not [f for f in os.listdir(jobs) if f.endswith('.snapshot')]
+
+    def test_run(self, compiled, tournament, monkeypatch):
+        monkeypatch.setattr(subprocess, 'Popen', lambda *args, **kwargs:
+                            type('Process', (object,), {'pid': os.getpid()}))
+        export_worker.start_export(tournament)
+        status, = export_worker.get_status('test')
+        assert status['state'] == 'running'
+
+        export_worker.run(status['snapshot'], None, 'pdf')
+        assert compiled == ['test-standings']
+        status, = export_worker.get_status('test')
+        assert status['state'] == 'done'
+        assert status['finished'] is not None
+
+    def test_failure(self, compiled, tournament, monkeypatch):
+        monkeypatch.setattr(subprocess, 'Popen', lambda *args, **kwargs:
+                            type('Process', (object,), {'pid': os.getpid()}))
+        monkeypatch.setattr(export, '_generate_export',
+                            lambda file, output_directory=None: 1)
+        export_worker.start_export(tournament, 0)
+        status, = export_worker.get_status('test')
+        export_worker.run(status['snapshot'], 0, 'pdf')
+        status, = export_worker.get_status('test')
+        assert status['state'] == 'failed'
+        assert 'exit code 1' in status['reason']
+
+    def test_stopped_worker(self, compiled, tournament, monkeypatch):
+        # the worker exits before it has loaded the snapshot
+        popen = subprocess.Popen
+        monkeypatch.setattr(subprocess, 'Popen', lambda args, **kwargs:
+                            popen([sys.executable, '-c', 'exit(1)'],
+                                  **kwargs))
+        export_worker.start_export(tournament, 0)
+        status, = self.wait('test')
+        assert status['state'] == 'failed'
+        assert status['pid'] is not None
+
+    def test_fast_worker(self, compiled, tournament, monkeypatch):
+        # the worker finishes before Popen returns
+        def popen(args, **kwargs):
+            export_worker.run(args[3], None, args[5])
+            return type('Process', (object,), {'pid': os.getpid()})
+        monkeypatch.setattr(subprocess, 'Popen', popen)
+        export_worker.start_export(tournament)
+        status, = export_worker.get_status('test')
+        assert status['state'] == 'done'
+        assert status['pid'] is None
@@ -0,0 +1,81 @@
+import pytest
+import sys
+import os
+import json
+
+sys.path.append(os.path.relpath("src/"))
+
+from data import json_serializer
+from data import lazy_json
+
+
+class TestJsonSerializer(object):
+
+    def test_round_trip(self, tournament, get_state):
+        decoded = json_serializer.loads(json_serializer.dumps(tournament))
+        assert get_state(decoded) == get_state(tournament)
+        assert decoded.get_game_by_id(5).team_b == 'e'
+
+    def test_round_trip_without_orjson(self, tournament, get_state, monkeypatch):
+        monkeypatch.setattr(json_serializer, 'orjson', None)
+        data = json_serializer.dumps(tournament)
+        assert json.loads(data)['rounds'][0][0] == [1, 'a', 'b', 13, 7, 0]
+        decoded = json_serializer.loads(data)
+        assert get_state(decoded) == get_state(tournament)
+
+    def test_same_file_without_orjson(self, tournament, monkeypatch):
+        pytest.importorskip('orjson')
+        tournament.teams[0].name = 'Bärlin'
+        data = json_serializer.dumps(tournament)
+        monkeypatch.setattr(json_serializer, 'orjson', None)
+        assert json_serializer.dumps(tournament) == data
+
+    def test_decode_old_format(self, tournament, get_state):
+        decoded = json_serializer.loads(get_state(tournament))
+        assert get_state(decoded) == get_state(tournament)
+        a, b = decoded.teams[:2]
+        assert decoded.get_game_of_teams(a, b).points_a == 13
+
+    @pytest.mark.parametrize('orjson', [True, False])
+    def test_get_sequence(self, tournament, get_state, tmp_path, monkeypatch,
+                          orjson):
+        if not orjson:
+            monkeypatch.setattr(json_serializer, 'orjson', None)
+        path = str(tmp_path / 'test.json')
+        for dumps in [json_serializer.dumps, lazy_json.dumps, get_state,
+                      lambda t: json.dumps(json.loads(get_state(t)),
+                                           indent=2)]:
+            with open(path, 'w') as outfile:
+                outfile.write(dumps(tournament))
+            assert json_serializer.get_sequence(path) == 7
+
+    def test_get_sequence_does_not_decode(self, tournament, tmp_path,
+                                          monkeypatch):
+        path = str(tmp_path / 'test.json')
+        with open(path, 'w') as outfile:
+            outfile.write(json_serializer.dumps(tournament))
+        monkeypatch.setattr(json_serializer, 'from_json', None)
+        assert json_serializer.get_sequence(path) == 7
+
+    def test_lazy_load_older_formats(self, tournament, get_state, tmp_path,
+                                     monkeypatch):
+        path = str(tmp_path / 'test.json')
+        from_json = json_serializer.from_json
+        parsed = []
+
+        def count_from_json(s):
+            parsed.append(len(s))
+            return from_json(s)
+
+        monkeypatch.setattr(json_serializer, 'from_json', count_from_json)
+        # a file in one line is parsed once, an indented file is parsed
+        # after its first line could not be
+        for dumps, parses in [
+                (json_serializer.dumps, 1),
+                (lambda t: json.dumps(json.loads(get_state(t)), indent=2),
+                 2)]:
+            with open(path, 'w') as outfile:
+                outfile.write(dumps(tournament))
+            del parsed[:]
+            assert get_state(lazy_json.load(path)) == get_state(tournament)
+            assert len(parsed) == parses
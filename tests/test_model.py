@@ -0,0 +1,73 @@
+import pytest
+import sys
+import os
+
+sys.path.append(os.path.relpath("src/"))
+
+from data.model import Tournament, Round, Team, Game
+from data.json_serializer import DataJSONEncoder, decode_data_json
+import json
+
+
+@pytest.fixture
+def tournament():
+    teams = [Team(name=name) for name in ['a', 'b', 'c', 'd']]
+    rnd = Round(games=[Game(1, 'a', 'b', 13, 7), Game(2, 'c', 'd')])
+    return Tournament(name='test', teams=teams, rounds=[rnd])
+
+
+class TestTournament(object):
+
+    def test_game_of_teams(self, tournament):
+        a, b, c, d = tournament.teams
+        assert tournament.get_game_of_teams(a, b).id == 1
+        assert tournament.get_game_of_teams(b, a).id == 1
+        assert tournament.get_game_of_teams(d, c).id == 2
+        assert tournament.get_game_of_teams(a, c) is None
+
+    def test_game_of_teams_add_and_pop_round(self, tournament):
+        a, b, c, d = tournament.teams
+        tournament.add_round(Round(games=[Game(3, 'a', 'c'),
+                                          Game(4, 'b', 'd')]))
+        assert tournament.get_game_of_teams(c, a).id == 3
+        tournament.pop_round()
+        assert tournament.get_game_of_teams(a, c) is None
+        assert tournament.get_game_of_teams(a, b).id == 1
+        tournament.reset()
+        assert tournament.get_game_of_teams(a, b) is None
+
+    def test_game_of_teams_after_decode(self, tournament):
+        data = json.dumps(tournament, cls=DataJSONEncoder)
+        decoded = json.loads(data, object_hook=decode_data_json)
+        a, b = decoded.teams[:2]
+        assert decoded.get_game_of_teams(a, b).points_a == 13
+
+    def test_games_of_team(self, tournament):
+        a, b, c, d = tournament.teams
+        tournament.add_round(Round(games=[Game(3, 'a', 'c'),
+                                          Game(4, 'b', 'd')]))
+        assert [g.id for g in tournament.get_games_of_team(a)] == [1, 3]
+        tournament.get_game_by_id(3).add_result(13, 2)
+        assert tournament.get_games_of_team(c)[-1].is_finished()
+        tournament.pop_round()
+        assert [g.id for g in tournament.get_games_of_team(c)] == [2]
+        tournament.reset()
+        assert tournament.get_games_of_team(a) == []
+
+    def test_team_by_name(self, tournament):
+        a = tournament.get_team_by_name('a')
+        assert a is tournament.teams[0]
+        tournament.remove_team(a)
+        assert tournament.get_team_by_name('a') is None
+        e = Team(name='e')
+        tournament.add_team(e)
+        assert tournament.get_team_by_name('e') is e
+
+    def test_game_by_id(self, tournament):
+        assert tournament.get_game_by_id(2).team_a == 'c'
+        tournament.add_round(Round(games=[Game(3, 'a', 'c')]))
+        assert tournament.get_game_by_id(3).team_b == 'c'
+        tournament.pop_round()
+        assert tournament.get_game_by_id(3) is None
+        tournament.reset()
+        assert tournament.get_game_by_id(1) is None
@@ -0,0 +1,230 @@
+import pytest
+import sys
+import os
+import random
+import time
+
+sys.path.append(os.path.relpath("src/"))
+
+from data.model import Tournament, Team
+from controller import swiss_system
+from controller.matching import max_weight_matching, min_cost_perfect_matching
+from controller.search import PairingSearch
+from controller.errors import SearchBudgetExpiredError
+
+
+def _create_tournament(number_of_teams):
+    tournament = Tournament(name='test')
+    for i in range(number_of_teams):
+        tournament.add_team(Team(name='team' + str(i), performance_value=i))
+    return tournament
+
+
+def _play_round(tournament):
+    for game in tournament.rounds[-1].games:
+        if not game.is_finished():
+            if random.randint(0, 1) == 1:
+                game.add_result(13, 7)
+            else:
+                game.add_result(7, 13)
+
+
+class TestMatching(object):
+
+    def test_max_weight_matching(self):
+        edges = [(0, 1, 6), (0, 2, 10), (1, 2, 5), (2, 3, 1)]
+        assert max_weight_matching(edges) == [2, -1, 0, -1]
+        assert max_weight_matching(edges, max_cardinality=True) == \
+            [1, 0, 3, 2]
+
+    def test_min_cost_perfect_matching(self):
+        edges = [(0, 1, 1), (0, 2, 5), (1, 3, 5), (2, 3, 1)]
+        assert min_cost_perfect_matching(4, edges) == [1, 0, 3, 2]
+
+    def test_no_perfect_matching(self):
+        assert min_cost_perfect_matching(4, [(0, 1, 1), (0, 2, 1),
+                                             (0, 3, 1)]) is None
+        assert min_cost_perfect_matching(3, [(0, 1, 1)]) is None
+
+    def test_stop_matching(self):
+        stages = []
+
+        def check():
+            stages.append(1)
+            if len(stages) == 2:
+                raise SearchBudgetExpiredError
+
+        edges = [(0, 1, 1), (0, 2, 5), (1, 3, 5), (2, 3, 1)]
+        with pytest.raises(SearchBudgetExpiredError):
+            min_cost_perfect_matching(4, edges, check)
+
+
+class TestSwissSystem(object):
+
+    @pytest.mark.parametrize('number_of_teams', [4, 7, 10, 13])
+    def test_round_robin_without_repeated_games(self, number_of_teams):
+        random.seed(number_of_teams)
+        tournament = _create_tournament(number_of_teams)
+        swiss_system.calculate_next_round(tournament)
+
+        # every team can play against every other team exactly once
+        max_rounds = number_of_teams - 1 + number_of_teams % 2
+        while len(tournament.rounds) < max_rounds:
+            _play_round(tournament)
+            swiss_system.calculate_next_round(tournament)
+
+        assert len(tournament.rounds) == max_rounds
+        pairs = [frozenset([g.team_a, g.team_b])
+                 for r in tournament.rounds for g in r.games
+                 if g.team_b is not None]
+        assert len(pairs) == len(set(pairs))
+        for r in tournament.rounds:
+            names = [n for g in r.games for n in (g.team_a, g.team_b)
+                     if n is not None]
+            assert len(names) == len(set(names)) == number_of_teams
+
+    @pytest.mark.parametrize('number_of_teams', [4, 7])
+    def test_no_round_after_round_robin(self, number_of_teams, capsys):
+        random.seed(number_of_teams)
+        tournament = _create_tournament(number_of_teams)
+        max_rounds = number_of_teams - 1 + number_of_teams % 2
+        while len(tournament.rounds) < max_rounds:
+            swiss_system.calculate_next_round(tournament)
+            _play_round(tournament)
+        free_rounds = [t.fl for t in tournament.teams]
+
+        swiss_system.calculate_next_round(tournament)
+        assert len(tournament.rounds) == max_rounds
+        assert [t.fl for t in tournament.teams] == free_rounds
+        assert 'No valid round possible' in capsys.readouterr().out
+
+    def test_first_round_half_split(self):
+        tournament = _create_tournament(8)
+        swiss_system.calculate_next_round(tournament)
+        assert [(g.team_a, g.team_b) for g in tournament.rounds[0].games] == \
+            [('team7', 'team3'), ('team6', 'team2'), ('team5', 'team1'),
+             ('team4', 'team0')]
+
+    @pytest.mark.parametrize('number_of_teams', [6, 9])
+    def test_incremental_standings(self, number_of_teams):
+        random.seed(number_of_teams)
+        tournament = _create_tournament(number_of_teams)
+        swiss_system.calculate_next_round(tournament)
+
+        for _ in range(4):
+            swiss_system.calculate_standings(tournament)
+            for game in tournament.rounds[-1].games:
+                if not game.is_finished():
+                    game.add_result(13, random.randint(0, 12))
+                    swiss_system.update_standings_for_game(tournament, game)
+                    assert swiss_system.verify_standings(tournament) == []
+            # overwrite a result
+            game = tournament.rounds[-1].games[-1]
+            game.add_result(game.points_b, game.points_a)
+            swiss_system.update_standings_for_game(tournament, game)
+            assert swiss_system.verify_standings(tournament) == []
+            swiss_system.calculate_next_round(tournament)
+
+    def test_numpy_standings_backend(self):
+        pytest.importorskip('numpy')
+        random.seed(1)
+        tournament = _create_tournament(11)
+        swiss_system.calculate_next_round(tournament)
+        for _ in range(5):
+            _play_round(tournament)
+            swiss_system.calculate_standings(tournament, backend='python')
+            expected = [(t.name, t.position, t.wins, t.bh, t.fbh, t.sb, t.koya)
+                        for t in tournament.teams]
+            swiss_system.calculate_standings(tournament, backend='numpy')
+            assert expected == [(t.name, t.position, t.wins, t.bh, t.fbh,
+                                 t.sb, t.koya) for t in tournament.teams]
+            swiss_system.calculate_next_round(tournament)
+
+    def test_expired_time_budget_uses_best_round(self):
+        random.seed(2)
+        tournament = _create_tournament(10)
+        swiss_system.calculate_next_round(tournament)
+        _play_round(tournament)
+
+        search = PairingSearch(time_budget=0)
+        search.expired = True
+        swiss_system.calculate_next_round(tournament, search)
+
+        assert len(tournament.rounds) == 2
+        assert search.best_quality is not None
+        names = [n for g in tournament.rounds[1].games
+                 for n in (g.team_a, g.team_b)]
+        assert len(set(names)) == 10
+        assert all(t.hl == 0 and t.games_against_hl == 0
+                   for t in tournament.teams)
+
+    def test_expired_time_budget_without_cheap_round(self, monkeypatch):
+        random.seed(2)
+        tournament = _create_tournament(10)
+        swiss_system.calculate_next_round(tournament)
+        _play_round(tournament)
+        monkeypatch.setattr(swiss_system, '_match_teams_fast',
+                            lambda tournament, teams, game_id: None)
+
+        search = PairingSearch(time_budget=0)
+        search.expired = True
+        swiss_system.calculate_next_round(tournament, search)
+
+        names = [n for g in tournament.rounds[1].games
+                 for n in (g.team_a, g.team_b)]
+        assert len(set(names)) == 10
+
+    def test_parallel_search_finds_same_rounds(self):
+        rounds = []
+        for workers in [1, 2]:
+            random.seed(3)
+            tournament = _create_tournament(15)
+            swiss_system.calculate_next_round(tournament)
+            for _ in range(4):
+                _play_round(tournament)
+                search = PairingSearch(workers=workers)
+                search.start()
+                try:
+                    swiss_system.calculate_next_round(tournament, search)
+                finally:
+                    search.stop()
+            rounds.append([(g.team_a, g.team_b) for r in tournament.rounds
+                           for g in r.games])
+        assert rounds[0] == rounds[1]
+
+    def test_time_budget_with_workers(self):
+        # each matching takes several seconds
+        n = 800
+        edges = [(i, j, (i * j) % 7)
+                 for i in range(n) for j in range(i + 1, n)]
+        search = PairingSearch(time_budget=0.2, workers=2)
+        start = time.monotonic()
+        search.start()
+        try:
+            with pytest.raises(SearchBudgetExpiredError):
+                list(swiss_system._solve_matchings([(n, edges)] * 2, search))
+        finally:
+            search.stop()
+        assert time.monotonic() - start < 2
+
+    @pytest.mark.parametrize('number_of_teams', [6, 7])
+    def test_remaining_rounds(self, number_of_teams):
+        random.seed(4)
+        tournament = _create_tournament(number_of_teams)
+        swiss_system.calculate_next_round(tournament)
+        _play_round(tournament)
+        swiss_system.calculate_standings(tournament)
+
+        max_rounds = number_of_teams - 1 + number_of_teams % 2
+        lower, upper = swiss_system.estimate_remaining_rounds(tournament)
+        assert lower <= upper == max_rounds - 1
+        assert swiss_system.check_next_round_possible(tournament,
+                                                      tournament.teams)
+
+        while len(tournament.rounds) < max_rounds:
+            swiss_system.calculate_next_round(tournament)
+            _play_round(tournament)
+        swiss_system.calculate_standings(tournament)
+        assert swiss_system.estimate_remaining_rounds(tournament) == (0, 0)
+        assert not swiss_system.check_next_round_possible(tournament,
+                                                          tournament.teams)
@@ -0,0 +1,60 @@
+import io
+import pytest
+import sys
+import os
+
+sys.path.append(os.path.relpath("src/"))
+
+from data.model import Tournament, Round, Team, Game
+from controller import tables
+
+
+@pytest.fixture
+def tournament():
+    teams = [Team(name=name, position=i + 1)
+             for i, name in enumerate(['alpha', 'b', 'c', 'd'])]
+    rnd = Round(games=[Game(1, 'alpha', 'b', 13, 4), Game(2, 'c', 'd'),
+                       Game(3, 'e', None, 13, 0)])
+    return Tournament(name='test', teams=teams, rounds=[rnd])
+
+
+class TestTables(object):
+
+    def test_round_rows(self, tournament):
+        assert list(tables.get_round_rows(tournament, 0)) == [
+            [1, 'alpha', 'b', 13, 4], [2, 'c', 'd', '', ''],
+            [3, 'e', 'free', 13, 0]]
+
+    def test_standings_rows_are_sorted(self, tournament):
+        tournament.teams[0].position = 4
+        tournament.teams[3].position = 1
+        assert [r[1] for r in tables.get_standings_rows(tournament)] == \
+            ['d', 'b', 'c', 'alpha']
+
+    def test_get_page(self, monkeypatch):
+        monkeypatch.setattr(tables, 'rows_per_page', 3)
+        assert list(tables.get_page(iter(range(10)))) == list(range(10))
+        assert list(tables.get_page(iter(range(10)), top=2)) == [0, 1]
+        assert list(tables.get_page(iter(range(10)), page=2)) == [3, 4, 5]
+        assert list(tables.get_page(iter(range(10)), page=4)) == [9]
+        assert list(tables.get_page(iter(range(10)), page=0)) == [0, 1, 2]
+
+    def test_write_text(self, tournament):
+        output = io.StringIO()
+        tables.write_text(output, ['Number', 'Team A', 'Team B', 'Points', ''],
+                          tables.get_round_rows(tournament, 0),
+                          [0, 0, 0, 8, 8])
+        assert output.getvalue().splitlines() == [
+            'Number  Team A  Team B  Points          ',
+            '-' * 40,
+            '1       alpha   b             13       4',
+            '2       c       d                       ',
+            '3       e       free          13       0']
+
+    def test_write_text_grows_with_values(self):
+        output = io.StringIO()
+        tables.write_text(output, ['N', 'Name'], iter([[123456, 'x' * 10]]),
+                          [0, 0])
+        header, line, row = output.getvalue().splitlines()
+        assert row == '123456  ' + 'x' * 10 + '  '
+        assert len(header) == len(line) == len(row)
@@ -0,0 +1,55 @@
+# converts tournament files between json and the compact binary format
+#
+# Usage: python3 tools/convert.py tournament.json tournament.tmb
+#        python3 tools/convert.py tournament.tmb tournament.json
+# The format of the output is chosen by its file ending. Json files of all
+# versions are read, json is written in the current format of the
+# tournament-manager, so it can be copied into the data folder.
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             os.pardir, 'src'))
+
+from data import binary
+from data import json_serializer
+from data import lazy_json
+
+_binary_ending = '.tmb'
+
+
+def convert(source, target):
+    if source.endswith(_binary_ending):
+        with binary.BinaryFile(source) as infile:
+            data = infile.load()
+    else:
+        data = lazy_json.load(source)
+
+    if target.endswith(_binary_ending):
+        with open(target, 'wb') as outfile:
+            outfile.write(binary.dumps(data))
+    else:
+        with open(target, 'w', encoding='utf-8') as outfile:
+            outfile.write(json_serializer.dumps(data))
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        description='Convert tournament files between json and the compact '
+                    'binary format (' + _binary_ending + ').')
+    parser.add_argument('source', metavar='Source',
+                        help='Tournament file to convert.')
+    parser.add_argument('target', metavar='Target',
+                        help='File to write, the format is chosen by its '
+                             'ending.')
+    return parser
+
+
+def main():
+    args = create_parser().parse_args()
+    convert(args.source, args.target)
+
+
+if __name__ == '__main__':
+    main()